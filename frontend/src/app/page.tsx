@@ -11,47 +11,93 @@ interface ProcessResult {
   pdfLink: string;
 }
 
+interface JobStatus {
+  success: boolean;
+  status?: string;
+  processed?: number;
+  failed?: number;
+  csv_drive_url?: string;
+  drive_url?: string;
+  error?: string;
+}
+
+const API_URL = 'http://localhost:8000';
+
+// Follows a job until it finishes, via the SSE stream when available and by
+// polling /status otherwise. Resolves with the final status, rejects on failure.
+function watchJob(jobId: string, onUpdate: (status: JobStatus) => void): Promise<JobStatus> {
+  return new Promise((resolve, reject) => {
+    const finish = (data: JobStatus) => {
+      if (data.status === 'Done') resolve(data);
+      else reject(new Error(data.error || 'Processing failed.'));
+    };
+    const poll = async () => {
+      while (true) {
+        const statusRes = await fetch(`${API_URL}/status/${jobId}`);
+        const data: JobStatus = await statusRes.json();
+        onUpdate(data);
+        if (statusRes.status !== 202) return finish(data);
+        await new Promise(r => setTimeout(r, 1000));
+      }
+    };
+    if (typeof EventSource === 'undefined') {
+      poll().catch(reject);
+      return;
+    }
+    const source = new EventSource(`${API_URL}/status/${jobId}/stream`);
+    source.addEventListener('status', (event) => {
+      const data: JobStatus = JSON.parse((event as MessageEvent).data);
+      onUpdate(data);
+      if (!data.success || data.status === 'Done' || data.status === 'failed') {
+        source.close();
+        finish(data);
+      }
+    });
+    source.onerror = () => {
+      // Stream unavailable or dropped: fall back to polling
+      source.close();
+      poll().catch(reject);
+    };
+  });
+}
+
 export default function Home() {
   const [result, setResult] = useState<ProcessResult | null>(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [isQueued, setIsQueued] = useState(false);
+  const [progress, setProgress] = useState<{ processed: number; failed: number } | null>(null);
+  const [stage, setStage] = useState('');
 
   const handleProcess = async (file: File | null, driveLink: string) => {
     setLoading(true);
     setError('');
     setResult(null);
     setIsQueued(false);
+    setProgress(null);
+    setStage('');
     try {
       if (file) {
         // Batch CSV processing
         setIsQueued(true);
         const formData = new FormData();
         formData.append('csv_file', file);
-        const uploadRes = await fetch('http://localhost:8000/batch_upload', { method: 'POST', body: formData });
+        const uploadRes = await fetch(`${API_URL}/batch_upload`, { method: 'POST', body: formData });
         const { csv_id } = await uploadRes.json();
-        let status = '';
-        let csvLink = '';
-        // Poll status until done
-        while (status !== 'Done') {
-          await new Promise(r => setTimeout(r, 1000));
-          const statusRes = await fetch(`http://localhost:8000/status/${csv_id}`);
-          const data = await statusRes.json();
-          if (statusRes.status === 200 && data.csv_drive_url) {
-            status = 'Done';
-            csvLink = data.csv_drive_url;
-          } else {
-            status = data.status;
+        const final = await watchJob(csv_id, (data) => {
+          if (data.processed !== undefined) {
+            setProgress({ processed: data.processed, failed: data.failed ?? 0 });
           }
-        }
-        setResult({ csvLink, pdfLink: '' });
+        });
+        setResult({ csvLink: final.csv_drive_url ?? '', pdfLink: '' });
       } else if (driveLink) {
         // Single CV processing
         const formData = new FormData();
         formData.append('drive_link', driveLink);
-        const uploadRes = await fetch('http://localhost:8000/upload', { method: 'POST', body: formData });
-        const data = await uploadRes.json();
-        setResult({ csvLink: '', pdfLink: data.drive_url });
+        const uploadRes = await fetch(`${API_URL}/upload`, { method: 'POST', body: formData });
+        const { cv_id } = await uploadRes.json();
+        const final = await watchJob(cv_id, (data) => setStage(data.status ?? ''));
+        setResult({ csvLink: '', pdfLink: final.drive_url ?? '' });
       }
     } catch (err) {
       setError('Processing failed. Please try again.');
@@ -100,12 +146,19 @@ export default function Home() {
           {isQueued && loading && !result && (
             <div className="mt-4 p-2 bg-blue-100 text-blue-800 rounded-md animate-fadeIn">
               The CSV is being processed in the background. You will be notified when it's ready.
+              {progress && (
+                <span className="block mt-1">
+                  Processed {progress.processed} rows so far ({progress.failed} failed).
+                </span>
+              )}
             </div>
           )}
           {loading && (
             <div className="mt-4 flex flex-col items-center animate-fadeIn">
               <Spinner className="w-12 h-12 mb-2" />
-              <p className="text-[#364957] animate-pulse">Processing...</p>
+              <p className="text-[#364957] animate-pulse">
+                {stage && stage !== 'queued' ? `${stage[0].toUpperCase()}${stage.slice(1)}...` : 'Processing...'}
+              </p>
             </div>
           )}
         </div>
@@ -1,4 +1,8 @@
 import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
 
 class Settings:
     GOOGLE_APPLICATION_CREDENTIALS: str = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
@@ -6,7 +10,110 @@ class Settings:
     project_root: str = "/app"                # root of /app in the container
     latex_service: str = "latex_compiler"  # Docker Compose service name
 
+    # CSV batch pipeline: workers per stage and bounded queue sizes
+    CSV_DOWNLOAD_WORKERS: int = int(os.getenv("CSV_DOWNLOAD_WORKERS", "4"))
+    CSV_PARSE_WORKERS: int = int(os.getenv("CSV_PARSE_WORKERS", "2"))
+    CSV_EXTRACT_WORKERS: int = int(os.getenv("CSV_EXTRACT_WORKERS", "4"))
+    CSV_COMPILE_WORKERS: int = int(os.getenv("CSV_COMPILE_WORKERS", "2"))
+    CSV_UPLOAD_WORKERS: int = int(os.getenv("CSV_UPLOAD_WORKERS", "4"))
+    CSV_STAGE_QUEUE_SIZE: int = int(os.getenv("CSV_STAGE_QUEUE_SIZE", "8"))
+    CSV_MAX_IN_FLIGHT: int = int(os.getenv("CSV_MAX_IN_FLIGHT", "32"))  # rows between reading and writing
+    # Worker threads for single-CV /upload jobs
+    UPLOAD_WORKERS: int = int(os.getenv("UPLOAD_WORKERS", "4"))
+    # Read size when copying an uploaded CSV to disk
+    CSV_UPLOAD_CHUNK_BYTES: int = int(os.getenv("CSV_UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+
+    # Where pdflatex runs: "pool" (warm containers), "docker" (`docker compose run --rm` per pass),
+    # "native" (a local TeX installation) or "auto" (native when pdflatex is on PATH, else pool)
+    LATEX_BACKEND: str = os.getenv("LATEX_BACKEND", "pool")
+    LATEX_NATIVE_BIN_DIR: str = os.getenv("LATEX_NATIVE_BIN_DIR", "")  # prepended to PATH for "native"
+    # Warm LaTeX compiler containers; 0 falls back to `docker compose run --rm` per pass
+    LATEX_POOL_SIZE: int = int(os.getenv("LATEX_POOL_SIZE", "2"))
+    LATEX_POOL_HEALTH_INTERVAL: float = float(os.getenv("LATEX_POOL_HEALTH_INTERVAL", "30"))
+
+    # Serve the shared CV preamble from a precompiled (dumped) LaTeX format
+    LATEX_PRECOMPILED_PREAMBLE: bool = os.getenv("LATEX_PRECOMPILED_PREAMBLE", "true").lower() in ("1", "true", "yes")
+    # Upper bound on pdflatex passes; extra passes only run when the log asks for one
+    LATEX_MAX_PASSES: int = int(os.getenv("LATEX_MAX_PASSES", "3"))
+
+    # Calls per Google Drive batch request (Drive allows at most 100)
+    DRIVE_BATCH_SIZE: int = int(os.getenv("DRIVE_BATCH_SIZE", "100"))
+    # Downloads up to this size stay in memory; larger ones go to a temp file
+    DRIVE_IN_MEMORY_MAX_BYTES: int = int(os.getenv("DRIVE_IN_MEMORY_MAX_BYTES", str(20 * 1024 * 1024)))
+    # Resumable uploads: chunk size (rounded to 256 KiB; -1 = whole file per request) and resume attempts
+    DRIVE_UPLOAD_CHUNK_BYTES: int = int(os.getenv("DRIVE_UPLOAD_CHUNK_BYTES", str(8 * 1024 * 1024)))
+    DRIVE_UPLOAD_MAX_RETRIES: int = int(os.getenv("DRIVE_UPLOAD_MAX_RETRIES", "5"))
+    DRIVE_UPLOAD_RETRY_BASE_SECONDS: float = float(os.getenv("DRIVE_UPLOAD_RETRY_BASE_SECONDS", "1"))
+    DRIVE_UPLOAD_RETRY_MAX_SECONDS: float = float(os.getenv("DRIVE_UPLOAD_RETRY_MAX_SECONDS", "30"))
+    # Alternative Drive API root, e.g. a local fake server; requests to it are not authenticated
+    DRIVE_API_ENDPOINT: str = os.getenv("DRIVE_API_ENDPOINT", "")
+
+    # PDF text extraction limits (0 = unlimited) and parallel extraction for long documents
+    PARSER_MAX_PAGES: int = int(os.getenv("PARSER_MAX_PAGES", "150"))
+    PARSER_MAX_BYTES: int = int(os.getenv("PARSER_MAX_BYTES", str(512 * 1024)))
+    PARSER_WORKERS: int = int(os.getenv("PARSER_WORKERS", "4"))
+    PARSER_PARALLEL_MIN_PAGES: int = int(os.getenv("PARSER_PARALLEL_MIN_PAGES", "60"))
+
+    # Text normalization between parsing and the LLM call
+    NORMALIZE_ENABLED: bool = os.getenv("NORMALIZE_ENABLED", "true").lower() in ("1", "true", "yes")
+    NORMALIZE_DROP_REPEATED_LINES: bool = os.getenv("NORMALIZE_DROP_REPEATED_LINES", "true").lower() in ("1", "true", "yes")
+    NORMALIZE_REPEATED_LINE_RATIO: float = float(os.getenv("NORMALIZE_REPEATED_LINE_RATIO", "0.5"))  # share of pages
+    NORMALIZE_EDGE_LINES: int = int(os.getenv("NORMALIZE_EDGE_LINES", "3"))  # lines per page treated as header/footer
+    NORMALIZE_DROP_PAGE_NUMBERS: bool = os.getenv("NORMALIZE_DROP_PAGE_NUMBERS", "true").lower() in ("1", "true", "yes")
+    NORMALIZE_MAX_CHARS: int = int(os.getenv("NORMALIZE_MAX_CHARS", "40000"))  # 0 = no cap
+
+    # Gemini client-side limits: sized to the project's quotas, with headroom
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_REQUESTS_PER_MINUTE: int = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "2000"))  # 0 = unlimited
+    LLM_TOKENS_PER_MINUTE: int = int(os.getenv("LLM_TOKENS_PER_MINUTE", "4000000"))  # 0 = unlimited
+    LLM_QUOTA_HEADROOM: float = float(os.getenv("LLM_QUOTA_HEADROOM", "0.9"))
+    LLM_BURST_SECONDS: float = float(os.getenv("LLM_BURST_SECONDS", "2"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "5"))
+    LLM_RETRY_BASE_SECONDS: float = float(os.getenv("LLM_RETRY_BASE_SECONDS", "1"))
+    LLM_RETRY_MAX_SECONDS: float = float(os.getenv("LLM_RETRY_MAX_SECONDS", "30"))
+
+    # Job status store: "sqlite" is shared by all uvicorn workers on a host, "memory" is per process
+    JOB_STORE_BACKEND: str = os.getenv("JOB_STORE_BACKEND", "sqlite")
+    JOB_STORE_PATH: str = os.getenv("JOB_STORE_PATH", ".data/jobs.sqlite3")
+    JOB_TTL_SECONDS: int = int(os.getenv("JOB_TTL_SECONDS", str(24 * 3600)))  # finished jobs; 0 = keep forever
+    # /status/{id}/stream: how often the store is checked for changes, and keep-alive spacing
+    STATUS_STREAM_POLL_SECONDS: float = float(os.getenv("STATUS_STREAM_POLL_SECONDS", "0.5"))
+    STATUS_STREAM_HEARTBEAT_SECONDS: float = float(os.getenv("STATUS_STREAM_HEARTBEAT_SECONDS", "15"))
+    # Uploaded CSVs and row checkpoints of batch jobs, kept until the job finishes so it can resume
+    BATCH_DIR: str = os.getenv("BATCH_DIR", ".data/batches")
+
+    # Local caches (relative paths are resolved against the project root)
+    CACHE_DIR: str = os.getenv("CACHE_DIR", ".cache")
+    PDF_CACHE_ENABLED: bool = os.getenv("PDF_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    PDF_CACHE_MAX_BYTES: int = int(os.getenv("PDF_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    LLM_CACHE_MAX_BYTES: int = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))  # 0 disables expiry
+    DRIVE_CACHE_ENABLED: bool = os.getenv("DRIVE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    DRIVE_CACHE_MAX_BYTES: int = int(os.getenv("DRIVE_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+    # Persist compiled Jinja2 templates under CACHE_DIR to speed up cold starts
+    TEMPLATE_BYTECODE_CACHE: bool = os.getenv("TEMPLATE_BYTECODE_CACHE", "false").lower() in ("1", "true", "yes")
+
+    # cProfile captures of single CV jobs and batch rows, listed and downloaded under /admin/profiles.
+    # Jobs are profiled when picked by the sample rate or sent with "X-Profile: 1".
+    PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_HEADER_ENABLED: bool = os.getenv("PROFILE_HEADER_ENABLED", "true").lower() in ("1", "true", "yes")
+    PROFILE_MAX_CONCURRENT: int = int(os.getenv("PROFILE_MAX_CONCURRENT", "1"))  # others run unprofiled
+    PROFILE_MAX_BYTES: int = int(os.getenv("PROFILE_MAX_BYTES", str(64 * 1024 * 1024)))  # oldest are evicted
+    # Required in the X-Admin-Token header by /admin endpoints; they are disabled while empty
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+
     class Config:
         env_file = ".env"
 
 settings = Settings()
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+def cache_dir(name: str) -> Path:
+    """Directory of the named local cache under CACHE_DIR."""
+    return PROJECT_ROOT / settings.CACHE_DIR / name
+
+def batch_dir(job_id: str = "") -> Path:
+    """Durable working directory of a CSV batch job (the BATCH_DIR root without an ID)."""
+    return PROJECT_ROOT / settings.BATCH_DIR / job_id
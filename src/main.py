@@ -1,6 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from src.routers import cv
+import logging
+from src.routers import admin, cv
+from src.services import compiler
+from src.utils import metrics
+
+log = logging.getLogger(__name__)
 
 app = FastAPI(title="CVForge API")
 
@@ -14,7 +19,33 @@ app.add_middleware(
 )
 
 app.include_router(cv.router)
+app.include_router(admin.router)
+
+@app.on_event("startup")
+def start_latex_backend():
+    # Compilations fall back to starting the backend lazily if this fails
+    try:
+        compiler.start_backend()
+    except Exception as e:
+        log.warning(f"Could not start LaTeX compiler backend: {e}")
+
+@app.on_event("startup")
+def resume_batches():
+    try:
+        cv.resume_interrupted_batches()
+    except Exception as e:
+        log.warning(f"Could not resume interrupted CSV jobs: {e}")
+
+@app.on_event("shutdown")
+def stop_workers():
+    cv.shutdown_cv_workers()
+    compiler.shutdown_backend()
 
 @app.get("/")
 def health():
     return {"status": "ok"}
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus metrics of this worker process."""
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Header, Response
+from fastapi.responses import FileResponse, PlainTextResponse
+from src.core.config import settings
+from src.utils import profiling
+from typing import Optional
+import hmac
+
+router = APIRouter(prefix="/admin")
+
+def _denied(response: Response, token: Optional[str]) -> Optional[dict]:
+    """Error body if the request may not use admin endpoints, else None."""
+    if not settings.ADMIN_TOKEN:
+        response.status_code = 404
+        return {"success": False,
+            "error": "Admin endpoints are disabled."}
+    if not token or not hmac.compare_digest(token, settings.ADMIN_TOKEN):
+        response.status_code = 403
+        return {"success": False,
+            "error": "Invalid admin token."}
+    return None
+
+@router.get("/profiles")
+def list_profiles(response: Response, x_admin_token: Optional[str] = Header(None)):
+    """
+    Lists stored cProfile captures, newest first. IDs contain the CV or batch
+    job ID (and row) they were taken for.
+    """
+    denied = _denied(response, x_admin_token)
+    if denied:
+        return denied
+    return {"success": True, "profiles": profiling.list_profiles()}
+
+@router.get("/profiles/{profile_id}")
+def get_profile(
+    response: Response,
+    profile_id: str,
+    format: str = "pstats",
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Downloads a capture in pstats format (for `python -m pstats` or snakeviz),
+    or with ?format=text its top functions by cumulative time.
+    """
+    denied = _denied(response, x_admin_token)
+    if denied:
+        return denied
+    path = profiling.profile_path(profile_id)
+    if path is None:
+        response.status_code = 404
+        return {"success": False,
+            "error": "Profile not found."}
+    if format == "text":
+        return PlainTextResponse(profiling.summary(profile_id) or "")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
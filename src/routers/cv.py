@@ -1,165 +1,675 @@
-from fastapi import APIRouter, Form, Response, UploadFile, File, BackgroundTasks
-from src.services import parser, llm, compiler, drive
-from src.utils.file_ops import temp_file_path
-from src.utils.inmemory import db
+from fastapi import APIRouter, Form, Header, Request, Response, UploadFile, File, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from src.core.config import batch_dir, settings
+from src.services import parser, llm, compiler, drive, normalizer
+from src.services.pipeline import Pipeline, Stage
+from src.utils.checkpoints import RowResult, checkpoints
+from src.utils.jobstore import jobs
+from src.utils import profiling
+from src.utils.metrics import registry
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
 import uuid
 import os
 from dotenv import load_dotenv
+import asyncio
+import fcntl
+import shutil
+import threading
+import time
 import csv, io
+import json
+import logging
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# Stages are the same for both flows: "cv" for /upload jobs, "csv" for batch rows.
+# Batch jobs also time their "metadata", "share" and "result_upload" steps.
+CSV_STAGES = ('download', 'parse', 'extract', 'compile', 'upload')
+JOB_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200, 21600)
+
+_stage_seconds = registry.histogram(
+    "cvforge_stage_seconds", "Time spent in a processing stage.", ("flow", "stage"))
+_stage_in_progress = registry.gauge(
+    "cvforge_stage_in_progress", "Items currently in a processing stage.", ("flow", "stage"))
+_stage_failures = registry.counter(
+    "cvforge_stage_failures_total", "Processing stage calls that raised.", ("flow", "stage"))
+_jobs_in_progress = registry.gauge(
+    "cvforge_jobs_in_progress", "Jobs currently running, by kind (cv or csv).", ("kind",))
+_jobs_finished = registry.counter(
+    "cvforge_jobs_finished_total", "Finished jobs by kind and outcome.", ("kind", "outcome"))
+_job_seconds = registry.histogram(
+    "cvforge_job_seconds", "Run time of jobs, excluding time spent queued.", ("kind",), buckets=JOB_BUCKETS)
+_cv_queue_seconds = registry.histogram(
+    "cvforge_cv_queue_seconds", "Time single-CV jobs waited for a worker.")
+_csv_rows = registry.counter(
+    "cvforge_csv_rows_total", "Processed CSV rows by outcome (done, failed, or skipped without a link).", ("outcome",))
+
+@lru_cache(maxsize=None)
+def _stage_metrics(flow: str, stage: str):
+    labels = {"flow": flow, "stage": stage}
+    return _stage_in_progress.labels(**labels), _stage_seconds.labels(**labels), _stage_failures.labels(**labels)
+
+@contextmanager
+def _stage(flow: str, stage: str) -> Iterator[None]:
+    """Times one processing stage, counting it as in progress meanwhile and as failed if it raises."""
+    in_progress, seconds, failures = _stage_metrics(flow, stage)
+    in_progress.inc()
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        failures.inc()
+        raise
+    finally:
+        in_progress.dec()
+        seconds.observe(time.perf_counter() - started)
+
+def _profile_requested(header: Optional[str]) -> bool:
+    """Whether an "X-Profile" request header asks for the job to be profiled."""
+    return settings.PROFILE_HEADER_ENABLED and (header or '').lower() in ('1', 'true', 'yes')
+
 @router.post("/upload")
 def upload_cv(
     response: Response,
-    drive_link: str = Form(...)
+    drive_link: str = Form(...),
+    x_profile: Optional[str] = Header(None)
 ):
+    """
+    Queues a single CV for processing and returns its ID right away. Progress
+    (queued, downloading, extracting, compiling, uploading, Done or failed)
+    is reported by /status/{cv_id} and /status/{cv_id}/stream.
+    With "X-Profile: 1" the job is profiled (see /admin/profiles).
+    """
     random_id = str(uuid.uuid4())
-    local_pdf = temp_file_path(suffix=".pdf")
-    drive.download_from_drive(random_id, drive_link, local_pdf)
-    
-    raw_text = parser.parse_text(local_pdf)
-
-    db.set(f"{random_id}",{
-        "status": "processing",
-    }),
-
-    structured_data = llm.extract_structured_data(raw_text)
-    pdf_path = compiler.compile_latex_string_to_pdf(structured_data)
-    new_drive_url = drive.upload_to_drive(random_id, pdf_path)
-    db.set(f"{random_id}",{
-        "drive_url": new_drive_url,
-        "status": "Done",
-    }),
-    # cleanup temp files
-    try:
-        os.remove(local_pdf)
-        os.remove(pdf_path)
-    except OSError:
-        pass
+    jobs.create(random_id, status="queued")
+    with _cv_queue_lock:
+        _queued_cv_jobs.add(random_id)
+    _get_cv_executor().submit(_process_cv_job, random_id, drive_link, time.monotonic(), _profile_requested(x_profile))
 
     response.status_code = 202
-    return {"success": True, 
+    return {"success": True,
             "cv_id": random_id,
-            "drive_url": new_drive_url,
-            "status": "Done"}
+            "status": "queued"}
+
+def _store_upload(upload: UploadFile, dest: Path):
+    """Copies an uploaded file to `dest` in CSV_UPLOAD_CHUNK_BYTES chunks; blocking, so run it off the event loop."""
+    with open(dest, 'wb') as f:
+        shutil.copyfileobj(upload.file, f, settings.CSV_UPLOAD_CHUNK_BYTES)
 
 @router.post("/batch_upload")
 async def batch_upload(
     background_tasks: BackgroundTasks,
-    csv_file: UploadFile = File(...)
+    csv_file: UploadFile = File(...),
+    x_profile: Optional[str] = Header(None)
 ):
     """
     Accepts a CSV file with a 'cv_link' column, assigns a job ID, and processes all CVs in the background.
-    Returns the job ID for the CSV processing.
+    Returns the job ID for the CSV processing. With "X-Profile: 1" its rows are
+    profiled, as many at a time as PROFILE_MAX_CONCURRENT allows.
     """
-    content = await csv_file.read()
-    # Save original CSV to a temp file
-    local_csv = temp_file_path(suffix='.csv')
-    with open(local_csv, 'wb') as f:
-        f.write(content)
     csv_id = str(uuid.uuid4())
-    db.set(csv_id, {'status': 'pending'})
-    background_tasks.add_task(_process_csv_job, csv_id, local_csv)
+    # Keep the original CSV in the job's durable directory so the job can resume;
+    # copied in chunks so large uploads are never held in memory
+    workdir = batch_dir(csv_id)
+    workdir.mkdir(parents=True)
+    partial = workdir / 'input.csv.part'
+    try:
+        await run_in_threadpool(_store_upload, csv_file, partial)
+        jobs.create(csv_id, status='pending', profile=_profile_requested(x_profile))
+        # Only a complete upload with a job record is ever picked up for resuming
+        os.replace(partial, workdir / 'input.csv')
+    except BaseException as e:
+        # No-op unless the record was created before the rename failed
+        jobs.transition(csv_id, 'failed', error=f'Could not store the uploaded CSV: {e}')
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+    background_tasks.add_task(_process_csv_job, csv_id)
     return {'success': True, 'csv_id': csv_id}
 
-def _process_cv_job(cv_id: str, drive_link: str):
-    """Helper to download, parse, generate, compile, and upload a single CV, updating db status."""
-    try:
-        # Download PDF 
-        local_pdf = temp_file_path(suffix='.pdf')
-        drive.download_from_drive(cv_id, drive_link, local_pdf)
-        # Parse, extract
-        raw_text = parser.parse_text(local_pdf)
-        db.set(cv_id, { 'status': 'processing' })
-        structured = llm.extract_structured_data(raw_text)
-        # Generate PDF
-        pdf_path = compiler.compile_latex_string_to_pdf(structured)
-        # Upload to Drive
-        new_url = drive.upload_to_drive(cv_id, pdf_path)
-        db.set(cv_id, { 'status': 'Done', 'drive_url': new_url })
-        # cleanup temp files
-        try:
-            os.remove(local_pdf)
-            os.remove(pdf_path)
-        except OSError:
-            pass
-    except Exception as e:
-        db.set(cv_id, { 'status': 'failed', 'error': str(e) })
+@router.post("/batch/{csv_id}/resume")
+def resume_batch(
+    response: Response,
+    background_tasks: BackgroundTasks,
+    csv_id: str
+):
+    """
+    Restarts an interrupted or failed CSV job. Rows finished before are taken
+    from their checkpoints; processing continues with the first unfinished row.
+    """
+    job = jobs.get(csv_id)
+    if not (batch_dir(csv_id) / 'input.csv').is_file() or (job and job['status'] == 'Done'):
+        response.status_code = 404
+        return {"success": False,
+            "error": "Batch job not found or already finished."}
+    if _batch_running(csv_id):
+        response.status_code = 409
+        return {"success": False,
+            "error": "Batch job is already running."}
+    if not jobs.transition(csv_id, 'pending', expected=('failed', 'pending', 'processing')):
+        jobs.create(csv_id, status='pending')
+    background_tasks.add_task(_process_csv_job, csv_id)
+    response.status_code = 202
+    return {'success': True, 'csv_id': csv_id, 'status': 'pending'}
+
+# Single-CV jobs run on their own worker pool, so /upload returns before any
+# download, LLM or compile work starts.
+_cv_executor: Optional[ThreadPoolExecutor] = None
+_cv_executor_lock = threading.Lock()
+# Jobs submitted but not started yet; failed on shutdown instead of left queued
+_queued_cv_jobs = set()
+_cv_queue_lock = threading.Lock()
+
+def _get_cv_executor() -> ThreadPoolExecutor:
+    global _cv_executor
+    if _cv_executor is None:
+        with _cv_executor_lock:
+            if _cv_executor is None:
+                _cv_executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.UPLOAD_WORKERS),
+                    thread_name_prefix="cv-job",
+                )
+    return _cv_executor
+
+def shutdown_cv_workers():
+    """Stops the single-CV worker pool; jobs that never started are marked failed."""
+    global _cv_executor
+    with _cv_executor_lock:
+        executor, _cv_executor = _cv_executor, None
+    if executor is None:
         return
+    executor.shutdown(wait=False, cancel_futures=True)
+    with _cv_queue_lock:
+        abandoned = list(_queued_cv_jobs)
+        _queued_cv_jobs.clear()
+    for cv_id in abandoned:
+        jobs.transition(cv_id, 'failed', expected=('queued',), error='Server shut down before the job started.')
 
-def _process_csv_job(job_id: str, csv_path: str):
-    """Process all CVs in a CSV: extract each, append drive_url, upload modified CSV."""
+def _process_cv_job(cv_id: str, drive_link: str, queued_at: float, profile: bool = False):
+    """Helper to download, parse, generate, compile, and upload a single CV, updating its job status."""
+    with _cv_queue_lock:
+        _queued_cv_jobs.discard(cv_id)
+    _cv_queue_seconds.observe(time.monotonic() - queued_at)
+    session = profiling.start(f"cv-{cv_id}", requested=profile)
+    outcome = 'failed'
     try:
-        db.set(job_id, {'status': 'processing'})
-        rows = []
-        with open(csv_path, newline='') as f:
-            reader = csv.DictReader(f)
-            fieldnames = reader.fieldnames + ['drive_url']
-            for row in reader:
-                link = row.get('cv_link') or row.get('cv-link')
-                if not link:
-                    row['drive_url'] = ''
-                else:
-                    cv_uuid = str(uuid.uuid4())
-                    local_pdf = temp_file_path(suffix='.pdf')
-                    drive.download_from_drive(cv_uuid, link, local_pdf)
-                    text = parser.parse_text(local_pdf)
-                    structured = llm.extract_structured_data(text)
-                    pdf_path = compiler.compile_latex_string_to_pdf(structured)
-                    new_url = drive.upload_to_drive(cv_uuid, pdf_path)
-                    row['drive_url'] = new_url
-                    # cleanup per-cv temp PDF
+        with _jobs_in_progress.labels(kind='cv').track(), _job_seconds.labels(kind='cv').time(), \
+                profiling.recording(session):
+            # Download PDF
+            jobs.transition(cv_id, 'downloading', expected=('queued',))
+            with _stage('cv', 'download'):
+                source = drive.download_from_drive(cv_id, drive_link)
+            # Parse, extract
+            jobs.transition(cv_id, 'extracting', expected=('downloading',))
+            with _stage('cv', 'parse'):
+                try:
+                    raw_text = normalizer.normalize_pages(parser.parse_pages(source), cv_id)
+                finally:
+                    _discard_download(source)
+            with _stage('cv', 'extract'):
+                structured = llm.extract_structured_data(raw_text)
+            # Generate PDF
+            jobs.transition(cv_id, 'compiling', expected=('extracting',))
+            with _stage('cv', 'compile'):
+                pdf_path = compiler.compile_latex_string_to_pdf(structured)
+            # Upload to Drive
+            jobs.transition(cv_id, 'uploading', expected=('compiling',))
+            with _stage('cv', 'upload'):
+                try:
+                    new_url = drive.upload_to_drive(cv_id, pdf_path)
+                finally:
+                    # cleanup temp files
                     try:
-                        os.remove(local_pdf)
                         os.remove(pdf_path)
                     except OSError:
                         pass
-                rows.append(row)
-        # Write modified CSV
-        new_csv = temp_file_path(suffix='.csv')
-        with open(new_csv, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
-        # Upload final CSV with a descriptive name
-        csv_url = drive.upload_to_drive(job_id, new_csv, drive_name='processed_csv.csv')
-        db.set(job_id, {'status': 'Done', 'csv_drive_url': csv_url})
-        # cleanup temp CSVs
+            jobs.transition(cv_id, 'Done', expected=('uploading',), drive_url=new_url)
+        outcome = 'done'
+    except Exception as e:
+        log.exception(f"CV job {cv_id} failed")
+        jobs.transition(cv_id, 'failed', error=str(e))
+    finally:
+        _jobs_finished.labels(kind='cv', outcome=outcome).inc()
+        if session is not None:
+            profile_id = session.save()
+            if profile_id:
+                jobs.update(cv_id, profile_id=profile_id)
+
+def _row_link(row: dict):
+    return row.get('cv_link') or row.get('cv-link')
+
+def _with_drive_metadata(rows):
+    """
+    Takes (index, row) pairs and yields ((index, row), metadata) pairs, fetching Drive metadata for DRIVE_BATCH_SIZE
+    rows per batch round trip, so bad or private links fail before any
+    download, LLM or compile work is spent on them.
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= settings.DRIVE_BATCH_SIZE:
+            yield from _validate_links(chunk)
+            chunk = []
+    if chunk:
+        yield from _validate_links(chunk)
+
+def _validate_links(rows: list):
+    links = [_row_link(row) for _, row in rows]
+    file_ids = [drive.extract_file_id(link) for link in links if link]
+    metadata = {}
+    if file_ids:
         try:
-            os.remove(new_csv)
-            os.remove(csv_path)
-        except OSError:
-            pass
+            with _stage('csv', 'metadata'):
+                metadata = drive.get_files_metadata(file_ids)
+        except Exception as e:
+            # Fall back to one metadata request per row in the download stage
+            log.warning(f"Batch metadata lookup failed: {e}")
+    for row, link in zip(rows, links):
+        yield row, metadata.get(drive.extract_file_id(link)) if link else None
+
+def _download_stage(item: tuple):
+    """Pipeline stage: download the row's CV, or end early when it has no link."""
+    (_, row), meta = item
+    link = _row_link(row)
+    if not link:
+        return None
+    if isinstance(meta, Exception):
+        raise meta
+    cv_uuid = str(uuid.uuid4())
+    return cv_uuid, drive.download_from_drive(cv_uuid, link, meta=meta)
+
+def _parse_stage(job: tuple):
+    cv_uuid, source = job
+    try:
+        return cv_uuid, normalizer.normalize_pages(parser.parse_pages(source), cv_uuid)
+    finally:
+        _discard_download(source)
+
+def _extract_stage(job: tuple):
+    cv_uuid, text = job
+    return cv_uuid, llm.extract_structured_data(text)
+
+def _compile_stage(job: tuple):
+    cv_uuid, structured = job
+    return cv_uuid, compiler.compile_latex_string_to_pdf(structured)
+
+def _upload_stage(job: tuple):
+    cv_uuid, pdf_path = job
+    try:
+        # Public access is granted in batches by _share_rows
+        return drive.upload_to_drive(cv_uuid, pdf_path, share=False)
+    finally:
+        _remove_quietly(pdf_path)
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _discard_download(source):
+    """Removes a downloaded CV if it was spooled to disk rather than kept in memory."""
+    if isinstance(source, str):
+        _remove_quietly(source)
+
+def _share_rows(job_id: str, results: Dict[int, RowResult]) -> int:
+    """
+    Makes the rows' uploaded CVs public with batched permission calls and
+    checkpoints the outcome per row. Returns how many rows newly failed.
+    """
+    by_file_id = {drive.extract_file_id(result.drive_url): result
+                  for result in results.values() if result.drive_url}
+    if not by_file_id:
+        return 0
+    try:
+        with _stage('csv', 'share'):
+            errors = drive.share_publicly(by_file_id)
     except Exception as e:
-        db.set(job_id, {'status': 'failed', 'error': str(e)})
+        errors = {file_id: e for file_id in by_file_id}
+    newly_failed = 0
+    for file_id, error in errors.items():
+        if error:
+            by_file_id[file_id].error = f"Could not share publicly: {error}"
+            newly_failed += 1
+        else:
+            by_file_id[file_id].shared = True
+    checkpoints.save_many(job_id, results)
+    return newly_failed
 
-@router.get("/status/{cv_id}")
-def get_status(response: Response, cv_id: str):
+def _build_csv_pipeline(profiles: "_RowProfiles") -> Pipeline:
+    """Download, parse, extract, compile and upload stages, each with its own worker pool."""
+    queue_size = settings.CSV_STAGE_QUEUE_SIZE
+    funcs = (_download_stage, _parse_stage, _extract_stage, _compile_stage, _upload_stage)
+    workers = (settings.CSV_DOWNLOAD_WORKERS, settings.CSV_PARSE_WORKERS, settings.CSV_EXTRACT_WORKERS,
+               settings.CSV_COMPILE_WORKERS, settings.CSV_UPLOAD_WORKERS)
+    return Pipeline([
+        Stage(name, _instrumented_stage(name, func, profiles), n, queue_size)
+        for name, func, n in zip(CSV_STAGES, funcs, workers)
+    ], max_in_flight=settings.CSV_MAX_IN_FLIGHT)
+
+class _RowProfiles:
     """
-    Fetches the status of a job using its ID.
+    cProfile captures of a batch job's rows while they move through the
+    pipeline, keyed by the CV ID the stages pass along. close() saves the
+    captures of rows that never left the pipeline, and any handed over later.
     """
-    cur_cv = db.get(cv_id)
-    if not cur_cv:
-        response.status_code = 404
-        return {"sucess": False, 
+    def __init__(self, job_id: str, requested: bool):
+        self.job_id = job_id
+        self.requested = requested
+        self._sessions: Dict[str, profiling.ProfileSession] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self, index: int) -> Optional[profiling.ProfileSession]:
+        return profiling.start(f"csv-{self.job_id}-row{index}", requested=self.requested)
+
+    def take(self, cv_uuid: str) -> Optional[profiling.ProfileSession]:
+        # A row's capture is handed over before the row is queued for the next stage
+        if not self._sessions:
+            return None
+        with self._lock:
+            return self._sessions.pop(cv_uuid, None)
+
+    def hand_over(self, cv_uuid: str, session: profiling.ProfileSession):
+        with self._lock:
+            if not self._closed:
+                self._sessions[cv_uuid] = session
+                return
+        session.save()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            session.save()
+
+def _instrumented_stage(name: str, func, profiles: _RowProfiles):
+    """
+    Wraps a pipeline stage with its metrics. The first stage decides whether
+    a row is profiled; its capture follows the row through the later stages
+    and is saved when the row leaves the pipeline.
+    """
+    first, last = name == CSV_STAGES[0], name == CSV_STAGES[-1]
+
+    def run(value):
+        if first:
+            (index, _), _ = value
+            session = profiles.start(index)
+        else:
+            session = profiles.take(value[0])
+        try:
+            with _stage('csv', name), profiling.recording(session):
+                result = func(value)
+        except Exception:
+            if session is not None:
+                session.save()
+            raise
+        if session is not None:
+            if result is None or last:
+                session.save()
+            else:
+                profiles.hand_over(result[0], session)
+        return result
+    return run
+
+# Pipelines of the CSV jobs running in this process, for the queue depth metric
+_running_pipelines = set()
+_running_pipelines_lock = threading.Lock()
+
+def _queue_depths():
+    with _cv_queue_lock:
+        queued = len(_queued_cv_jobs)
+    yield {"queue": "cv_jobs"}, queued
+    depths = dict.fromkeys(CSV_STAGES, 0)
+    with _running_pipelines_lock:
+        pipelines = list(_running_pipelines)
+    for pipeline in pipelines:
+        for name, depth in pipeline.queue_depths().items():
+            depths[name] += depth
+    for name, depth in depths.items():
+        yield {"queue": f"csv_{name}"}, depth
+
+registry.callback("cvforge_queue_depth", "Items waiting in a queue for a worker.", "gauge", _queue_depths)
+
+@contextmanager
+def _batch_lock(job_id: str) -> Iterator[bool]:
+    """
+    Exclusive lock on a batch job's directory, held while the job runs. The
+    OS drops it when the process dies, so a free lock means nobody is working
+    on the job. Yields whether the lock was acquired.
+    """
+    with open(batch_dir(job_id) / 'lock', 'a') as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+def _batch_running(job_id: str) -> bool:
+    with _batch_lock(job_id) as acquired:
+        return not acquired
+
+def _discard_batch(job_id: str):
+    checkpoints.delete(job_id)
+    shutil.rmtree(batch_dir(job_id), ignore_errors=True)
+
+def resume_interrupted_batches():
+    """
+    Restarts CSV jobs that were still running when the previous process
+    stopped; called at startup. Failed jobs are left for /batch/{id}/resume.
+    Directories without a job record are never resumed: no client was given
+    their ID, or their record expired. They are removed after JOB_TTL_SECONDS.
+    """
+    root = batch_dir()
+    if not root.is_dir():
+        return
+    for workdir in root.iterdir():
+        if not workdir.is_dir():
+            continue
+        job_id = workdir.name
+        job = jobs.get(job_id)
+        if job is None:
+            # Younger ones may be an upload still being stored by another worker
+            age = time.time() - workdir.stat().st_mtime
+            if settings.JOB_TTL_SECONDS and age > settings.JOB_TTL_SECONDS:
+                _discard_batch(job_id)
+            continue
+        if not (workdir / 'input.csv').is_file():
+            continue
+        if job['status'] == 'Done':
+            _discard_batch(job_id)
+            continue
+        if job['status'] not in ('pending', 'processing'):
+            continue
+        if _batch_running(job_id):
+            continue
+        log.info(f"Resuming interrupted CSV job {job_id}")
+        threading.Thread(target=_process_csv_job, args=(job_id,), name=f"csv-resume-{job_id[:8]}", daemon=True).start()
+
+def _process_csv_job(job_id: str):
+    """Process all CVs in a CSV: extract each, append drive_url, upload modified CSV.
+
+    Rows run through a staged pipeline so downloads, LLM calls, compiles and
+    uploads for different rows overlap. Every finished row is checkpointed, so
+    after a crash or restart the job resumes with the first unfinished row.
+    Rows are written back in input order; a failed row gets an empty drive_url
+    and its error instead of failing the job.
+    """
+    try:
+        with _batch_lock(job_id) as acquired:
+            if not acquired:
+                log.info(f"CSV job {job_id} is already running in another worker")
+                return
+            with _jobs_in_progress.labels(kind='csv').track(), _job_seconds.labels(kind='csv').time():
+                _run_csv_job(job_id)
+    except Exception as e:
+        log.exception(f"CSV job {job_id} failed")
+        jobs.transition(job_id, 'failed', error=str(e))
+        _jobs_finished.labels(kind='csv', outcome='failed').inc()
+
+def _unfinished_rows(job_id: str, csv_path: str):
+    """Yields (index, row) for the rows of the CSV that have no checkpoint yet, reading both lazily."""
+    finished = checkpoints.iter_results(job_id)
+    next_finished = next(finished, None)
+    with open(csv_path, newline='') as f:
+        for index, row in enumerate(csv.DictReader(f)):
+            if next_finished is not None and next_finished[0] == index:
+                next_finished = next(finished, None)
+                continue
+            yield index, row
+
+def _run_csv_job(job_id: str):
+    workdir = batch_dir(job_id)
+    input_csv = str(workdir / 'input.csv')
+    processed, failed = checkpoints.counts(job_id)
+    if not jobs.transition(job_id, 'processing', expected=('pending', 'processing'), processed=processed, failed=failed):
+        if jobs.get(job_id) is not None:
+            return  # finished or failed meanwhile
+        jobs.create(job_id, status='processing', processed=processed, failed=failed)
+    if processed:
+        log.info(f"CSV job {job_id}: {processed} rows already done, resuming")
+
+    # Rows checkpointed before a restart may not have been shared yet
+    failed += _share_rows(job_id, checkpoints.load_unshared(job_id))
+
+    # The output is written row by row while the job runs: earlier rows come from
+    # their checkpoints, the rest from the pipeline, which keeps input order.
+    # Rows are held back only until their CVs are shared, at most a Drive batch.
+    finished = checkpoints.iter_results(job_id)
+    profiles = _RowProfiles(job_id, requested=bool((jobs.get(job_id) or {}).get('profile')))
+    pipeline = _build_csv_pipeline(profiles)
+    with _running_pipelines_lock:
+        _running_pipelines.add(pipeline)
+    fresh = pipeline.run(_with_drive_metadata(_unfinished_rows(job_id, input_csv)))
+    new_csv = workdir / 'output.csv'
+    try:
+        with open(input_csv, newline='') as src, open(new_csv, 'w', newline='') as dst:
+            reader = csv.DictReader(src)
+            writer = csv.DictWriter(dst, fieldnames=reader.fieldnames + ['drive_url', 'error'])
+            writer.writeheader()
+            held = []
+            unshared = {}
+            next_finished = next(finished, None)
+            for index, row in enumerate(reader):
+                if next_finished is not None and next_finished[0] == index:
+                    result = next_finished[1]
+                    next_finished = next(finished, None)
+                else:
+                    ((fresh_index, _), _), new_url, error = next(fresh)
+                    if fresh_index != index:
+                        raise RuntimeError(f"CSV row {fresh_index} came back out of order (expected {index}).")
+                    result = RowResult(drive_url=new_url or '', error=str(error) if error else '', shared=False)
+                    checkpoints.save(job_id, index, result)
+                    if result.drive_url:
+                        unshared[index] = result
+                    processed += 1
+                    failed += 1 if error else 0
+                    _csv_rows.labels(outcome='failed' if error else 'done' if new_url else 'skipped').inc()
+                    jobs.update(job_id, processed=processed, failed=failed)
+                held.append((row, result))
+                if len(held) >= settings.DRIVE_BATCH_SIZE or not unshared:
+                    failed += _share_rows(job_id, unshared)
+                    unshared = {}
+                    _write_rows(writer, held)
+                    held = []
+            failed += _share_rows(job_id, unshared)
+            _write_rows(writer, held)
+    finally:
+        fresh.close()
+        finished.close()
+        with _running_pipelines_lock:
+            _running_pipelines.discard(pipeline)
+        profiles.close()
+    # Upload final CSV with a descriptive name
+    with _stage('csv', 'result_upload'):
+        csv_url = drive.upload_to_drive(job_id, str(new_csv), drive_name='processed_csv.csv')
+    # error=None drops the error of an earlier run that failed and was resumed
+    jobs.transition(job_id, 'Done', expected=('processing',), csv_drive_url=csv_url,
+                    processed=processed, failed=failed, error=None)
+    _jobs_finished.labels(kind='csv', outcome='done').inc()
+    _discard_batch(job_id)
+
+def _write_rows(writer: csv.DictWriter, rows: list):
+    for row, result in rows:
+        row['drive_url'] = result.drive_url
+        row['error'] = result.error
+        writer.writerow(row)
+
+# Statuses of jobs that are still running: "pending" and "processing" for CSV
+# jobs, the per-step ones for single CVs
+ACTIVE_STATUSES = ("pending", "processing", "queued", "downloading", "extracting", "compiling", "uploading")
+
+def _status_payload(job: Optional[dict]) -> Tuple[int, dict]:
+    """HTTP status code and body describing a job; shared by /status and its stream."""
+    if not job:
+        return 404, {"sucess": False,
             "error": "CV ID not found."}
-    if cur_cv["status"] == "pending":
-        response.status_code = 202
-        return {"success": True, "status": "pending"}
-    elif cur_cv["status"] == "processing":
-        response.status_code = 202
-        return {"success": True, "status": "processing"}
-    elif cur_cv["status"] == "Done":
-        response.status_code = 200
+    # Row counts of CSV jobs, so clients can show progress
+    progress = {key: job[key] for key in ('processed', 'failed') if key in job}
+    if job["status"] in ACTIVE_STATUSES:
+        return 202, {"success": True, "status": job["status"], **progress}
+    elif job["status"] == "Done":
         # Return CSV URL if batch job, else individual CV URL
-        if 'csv_drive_url' in cur_cv:
-            return {"success": True, "csv_drive_url": cur_cv["csv_drive_url"]}
-        return {"success": True, "drive_url": cur_cv.get("drive_url")}
-    
-    response.status_code = 500
-    return {"success": False,
+        if 'csv_drive_url' in job:
+            return 200, {"success": True, "status": "Done", "csv_drive_url": job["csv_drive_url"], **progress}
+        return 200, {"success": True, "status": "Done", "drive_url": job.get("drive_url")}
+    elif job["status"] == "failed":
+        return 500, {"success": False, "status": "failed", "error": job.get("error", "Processing failed.")}
+
+    return 500, {"success": False,
         "error": "Unexpected status value."}
 
+@router.get("/status/{cv_id}")
+def get_status(response: Response, cv_id: str):
+    """
+    Fetches the status of a job using its ID.
+    """
+    response.status_code, body = _status_payload(jobs.get(cv_id))
+    return body
+
+@router.get("/status/{cv_id}/stream")
+async def stream_status(request: Request, cv_id: str):
+    """
+    Server-Sent Events version of /status: sends a `status` event with the
+    same body as /status whenever the job changes (including row progress),
+    and ends the stream once the job is finished, failed or unknown.
+    """
+    return StreamingResponse(
+        _status_events(request, cv_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _status_events(request: Request, cv_id: str):
+    # The job store is shared between worker processes, so changes are picked
+    # up by checking it here rather than by in-process notifications.
+    last_body = None
+    idle = 0.0
+    while not await request.is_disconnected():
+        # jobs.get may hit SQLite; keep it off the event loop
+        status_code, body = _status_payload(await run_in_threadpool(jobs.get, cv_id))
+        if body != last_body:
+            yield f"event: status\ndata: {json.dumps(body)}\n\n"
+            if status_code != 202:
+                return
+            last_body = body
+            idle = 0.0
+        elif idle >= settings.STATUS_STREAM_HEARTBEAT_SECONDS:
+            # Comment line; keeps proxies from closing an idle connection
+            yield ": keep-alive\n\n"
+            idle = 0.0
+        await asyncio.sleep(settings.STATUS_STREAM_POLL_SECONDS)
+        idle += settings.STATUS_STREAM_POLL_SECONDS
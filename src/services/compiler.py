@@ -1,27 +1,59 @@
-import subprocess
 import tempfile
 import shutil
 import logging
 import uuid
+import hashlib
+import time
+import re
+import threading
+from datetime import datetime
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 import os
 
+from src.core.config import PROJECT_ROOT, cache_dir, settings
 from src.models.dtos import CVSchema
-from src.services.templater import generate_cv_latex
+from src.services.latex_backends import CompilerBackend, LatexSession, create_backend
+from src.services.templater import CV_PREAMBLE, TEMPLATE_VERSION, generate_cv_latex
+from src.utils.disk_cache import DiskCache
+from src.utils.metrics import cache_samples, registry, stat_samples
 
 # --- Configuration ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 log = logging.getLogger(__name__)
 
-# Determine Project Root dynamically
-PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 DEFAULT_OUTPUT_DIR = PROJECT_ROOT / "generated_pdfs"
-DOCKER_SERVICE_NAME = "latex_compiler"
+PREAMBLE_FORMAT_ROOT = PROJECT_ROOT / ".latex_formats"
 LATEX_COMPILER = "pdflatex"
 
 DEFAULT_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 # --- End Configuration ---
 
+_pdf_cache: Optional[DiskCache] = None
+_pdf_cache_lock = threading.Lock()
+
+def _get_pdf_cache() -> Optional[DiskCache]:
+    """Returns the compiled-PDF cache, or None when caching is disabled."""
+    global _pdf_cache
+    if not settings.PDF_CACHE_ENABLED:
+        return None
+    if _pdf_cache is None:
+        with _pdf_cache_lock:
+            if _pdf_cache is None:
+                _pdf_cache = DiskCache(
+                    cache_dir("pdf"),
+                    max_bytes=settings.PDF_CACHE_MAX_BYTES,
+                    suffix=".pdf",
+                )
+    return _pdf_cache
+
+def _pdf_cache_key(latex_string: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(TEMPLATE_VERSION.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(latex_string.encode("utf-8"))
+    return digest.hexdigest()
+
 class LatexCompilationError(Exception):
     """Custom exception for LaTeX compilation failures."""
     def __init__(self, message, stdout=None, stderr=None, log_content=None):
@@ -30,6 +62,188 @@ class LatexCompilationError(Exception):
         self.stderr = stderr
         self.log_content = log_content
 
+_backend: Optional[CompilerBackend] = None
+_backend_lock = threading.Lock()
+
+def _get_backend() -> CompilerBackend:
+    """The compiler backend selected by LATEX_BACKEND, created on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+def start_backend():
+    """Prepares the compiler backend (e.g. starts warm containers) ahead of the first compilation."""
+    _get_backend().start()
+
+def shutdown_backend():
+    global _backend
+    with _backend_lock:
+        backend, _backend = _backend, None
+    if backend is not None:
+        backend.shutdown()
+
+def _format_dir(backend: CompilerBackend) -> Path:
+    return PREAMBLE_FORMAT_ROOT / backend.format_family
+
+_format_lock = threading.Lock()
+# (format family, preamble digest) of formats that could not be built or did not work
+_format_failures = set()
+
+def _format_key(backend: CompilerBackend) -> Tuple[str, str]:
+    return backend.format_family, hashlib.sha256(CV_PREAMBLE.encode("utf-8")).hexdigest()[:16]
+
+def _mark_format_unusable(backend: CompilerBackend, format_name: str):
+    """Stops using the format in this process, e.g. after the full preamble compiled where it failed."""
+    log.error(f"Precompiled format '{format_name}' does not work; compiling with the full preamble from now on.")
+    _format_failures.add(_format_key(backend))
+
+def _preamble_format(backend: CompilerBackend, session: LatexSession) -> Optional[str]:
+    """
+    Returns the name of a precompiled format holding CV_PREAMBLE, dumping it
+    first if the preamble changed since the last build. Returns None when the
+    feature is disabled or the format cannot be built; callers then compile
+    the full preamble as before.
+    """
+    if not settings.LATEX_PRECOMPILED_PREAMBLE:
+        return None
+    failure_key = _format_key(backend)
+    if failure_key in _format_failures:
+        return None
+    format_name = f"cvpreamble_{failure_key[1]}"
+    format_dir = _format_dir(backend)
+    if (format_dir / f"{format_name}.fmt").exists():
+        return format_name
+    with _format_lock:
+        if (format_dir / f"{format_name}.fmt").exists():
+            return format_name
+        if _build_preamble_format(backend, session, format_name):
+            return format_name
+        _format_failures.add(failure_key)
+        return None
+
+def _build_preamble_format(backend: CompilerBackend, session: LatexSession, format_name: str) -> bool:
+    """Dumps CV_PREAMBLE into `<format_name>.fmt` using mylatexformat."""
+    format_dir = _format_dir(backend)
+    format_dir.mkdir(parents=True, exist_ok=True)
+    job_name = f"build_{uuid.uuid4().hex}"
+    source = format_dir / f"{job_name}.tex"
+    with open(source, "w", encoding="utf-8") as f:
+        f.write(CV_PREAMBLE + "\\begin{document}\n\\end{document}\n")
+    log.info(f"Building precompiled LaTeX format '{format_name}'")
+    try:
+        process = session.run([
+            LATEX_COMPILER,
+            "-ini",
+            "-interaction=nonstopmode",
+            f"-jobname={job_name}",
+            f"-output-directory={backend.path(format_dir)}",
+            f"&{LATEX_COMPILER}",
+            "mylatexformat.ltx",
+            backend.path(source),
+        ])
+        built = format_dir / f"{job_name}.fmt"
+        if process.returncode != 0 or not built.exists():
+            log.warning(f"Could not build format '{format_name}' (exit code {process.returncode}); using the full preamble.")
+            return False
+        os.replace(built, format_dir / f"{format_name}.fmt")
+        # Formats dumped from older preambles are never used again
+        for stale in format_dir.glob("cvpreamble_*.fmt"):
+            if stale.stem != format_name and re.fullmatch(r"cvpreamble_[0-9a-f]{16}", stale.stem):
+                stale.unlink(missing_ok=True)
+        log.info(f"Precompiled LaTeX format '{format_name}' is ready.")
+        return True
+    finally:
+        for leftover in format_dir.glob(f"{job_name}.*"):
+            leftover.unlink(missing_ok=True)
+
+def _latex_command(backend: CompilerBackend, format_name: Optional[str], tex_file: Path) -> Tuple[List[str], Dict[str, str]]:
+    """Builds the pdflatex arguments and environment, using the precompiled format if given."""
+    args = [LATEX_COMPILER]
+    env = {}
+    if format_name:
+        args.append(f"-fmt={format_name}")
+        # Trailing ':' keeps the default format search path as well
+        env["TEXFORMATS"] = f"{backend.path(_format_dir(backend))}:"
+    args += [
+        "-interaction=nonstopmode",
+        f"-output-directory={backend.path(tex_file.parent)}",
+        backend.path(tex_file)
+    ]
+    return args, env
+
+_FATAL_LOG_PATTERNS = re.compile(
+    r"^! Emergency stop\.|==> Fatal error occurred|^No pages of output\.",
+    re.MULTILINE,
+)
+_RERUN_LOG_PATTERNS = re.compile(
+    r"Rerun to get|Label\(s\) may have changed|Please rerun LaTeX|There were undefined references",
+)
+
+def _read_log(log_path: Path) -> Optional[str]:
+    if not log_path.exists():
+        return None
+    try:
+        with open(log_path, "r", encoding='utf-8', errors='ignore') as logf:
+            return logf.read()
+    except Exception as log_read_err:
+        log.warning(f"Could not read log file {log_path}: {log_read_err}")
+        return None
+
+def _file_digest(path: Path) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.md5(f.read()).hexdigest()
+    except OSError:
+        return None
+
+def _has_fatal_error(log_content: Optional[str]) -> bool:
+    """True when the log shows pdflatex gave up, so another pass cannot succeed."""
+    return bool(log_content and _FATAL_LOG_PATTERNS.search(log_content))
+
+def _requests_rerun(log_content: Optional[str]) -> bool:
+    return bool(log_content and _RERUN_LOG_PATTERNS.search(log_content))
+
+# Running totals of pdflatex passes, to compare against the old fixed two passes.
+_pass_stats = {"compilations": 0, "passes": 0, "pass_seconds": 0.0}
+_pass_stats_lock = threading.Lock()
+
+def _record_passes(pass_times: List[float]):
+    with _pass_stats_lock:
+        _pass_stats["compilations"] += 1
+        _pass_stats["passes"] += len(pass_times)
+        _pass_stats["pass_seconds"] += sum(pass_times)
+
+def get_pass_stats() -> dict:
+    """
+    Returns pass counts and timings since startup, including the estimated
+    time saved compared with always running two passes.
+    """
+    with _pass_stats_lock:
+        stats = dict(_pass_stats)
+    avg_pass = stats["pass_seconds"] / stats["passes"] if stats["passes"] else 0.0
+    skipped = max(0, 2 * stats["compilations"] - stats["passes"])
+    stats["avg_pass_seconds"] = avg_pass
+    stats["passes_skipped"] = skipped
+    stats["estimated_seconds_saved"] = skipped * avg_pass
+    return stats
+
+def cache_stats() -> dict:
+    """Hit/miss counters of the compiled-PDF cache since startup."""
+    cache = _get_pdf_cache()
+    return cache.stats() if cache is not None else {"hits": 0, "misses": 0}
+
+registry.callback("cvforge_latex_compilations_total", "LaTeX compilations run (PDF cache misses).", "counter",
+                  stat_samples(get_pass_stats, "compilations"))
+registry.callback("cvforge_latex_passes_total", "pdflatex passes run.", "counter",
+                  stat_samples(get_pass_stats, "passes"))
+registry.callback("cvforge_latex_pass_seconds_total", "Time spent in pdflatex passes.", "counter",
+                  stat_samples(get_pass_stats, "pass_seconds"))
+registry.callback("cvforge_pdf_cache_requests_total", "Compiled-PDF cache lookups by result.", "counter",
+                  cache_samples(cache_stats))
+
 def compile_latex_string_to_pdf(
     cv_schema: CVSchema,
     output_dir: Path = DEFAULT_OUTPUT_DIR,
@@ -39,7 +253,10 @@ def compile_latex_string_to_pdf(
     if not isinstance(cv_schema, CVSchema):
         raise TypeError("cv_schema must be an instance of CVSchema.")
     
-    latex_string = generate_cv_latex(cv_schema)
+    # Pin "Last updated" to the current month so identical CVs render to
+    # identical LaTeX and can be served from the PDF cache.
+    last_updated = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    latex_string = generate_cv_latex(cv_schema, last_updated=last_updated)
 
     # SAVE THE STRING TO FILE
 
@@ -52,6 +269,20 @@ def compile_latex_string_to_pdf(
 
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    pdf_cache = _get_pdf_cache()
+    cache_key = _pdf_cache_key(latex_string)
+    if pdf_cache is not None:
+        cached_pdf = pdf_cache.get_path(cache_key)
+        if cached_pdf is not None:
+            final_pdf_path = (output_dir / f"{output_filename_base}_{uuid.uuid4()}.pdf").resolve()
+            try:
+                shutil.copyfile(cached_pdf, final_pdf_path)
+                log.info(f"Served PDF from cache ({cache_key[:12]}): {final_pdf_path}")
+                return final_pdf_path
+            except OSError as e:
+                # Evicted between lookup and copy; compile as usual
+                log.warning(f"Could not copy cached PDF {cached_pdf}: {e}")
+
     temp_dir_name = f"latex_temp_{uuid.uuid4()}"
     temp_dir_host_path = PROJECT_ROOT / temp_dir_name
     temp_dir_host_path.mkdir()
@@ -67,51 +298,68 @@ def compile_latex_string_to_pdf(
         with open(temp_tex_file_host, "w", encoding="utf-8") as f:
             f.write(latex_string)
 
-        temp_dir_container = Path("/app") / temp_dir_host_path.name
-        temp_tex_file_container = temp_dir_container / temp_tex_file_host.name
-
-        for run in range(1, 3):
-            log.info(f"Starting Docker LaTeX compilation via service '{DOCKER_SERVICE_NAME}' (Pass {run}/2)...")
-            cmd = [
-                "docker", "compose", "run", "--rm",
-                "--user", f"{os.getuid()}:{os.getgid()}",
-                DOCKER_SERVICE_NAME,
-                LATEX_COMPILER,
-                "-interaction=nonstopmode",
-                f"-output-directory={temp_dir_container}",
-                str(temp_tex_file_container)
-            ]
-            log.debug(f"Executing command: {' '.join(map(str, cmd))}")
-
-            process = subprocess.run(
-                cmd,
-                capture_output=True, text=True, encoding='utf-8',
-                cwd=PROJECT_ROOT, check=False
-            )
-
-            # treat exit code 1 as warning if PDF was produced
-            if process.returncode not in (0, 1):
-                log.error(f"Docker LaTeX compilation failed (Pass {run})!")
-                log_content = None
-                if temp_log_file_host.exists():
-                    try:
-                        with open(temp_log_file_host, "r", encoding='utf-8', errors='ignore') as logf:
-                            log_content = logf.read()
-                            log.debug(f"Log content from {temp_log_file_host}:\n{log_content}")
-                    except Exception as log_read_err:
-                        log.warning(f"Could not read log file {temp_log_file_host}: {log_read_err}")
-                raise LatexCompilationError(
-                    f"LaTeX compilation failed on pass {run}.",
-                    stdout=process.stdout, stderr=process.stderr, log_content=log_content
-                )
-            elif process.returncode == 1 and temp_pdf_file_host.exists():
-                log.warning(f"pdflatex returned code 1 on pass {run} but PDF exists; continuing.")
-            else:
-                log.info(f"Docker LaTeX compilation (Pass {run}/2) successful.")
+        temp_aux_file_host = temp_dir_host_path / f"{temp_base_name}.aux"
+        max_passes = max(1, settings.LATEX_MAX_PASSES)
+        pass_times = []
+        backend = _get_backend()
+        with backend.session() as session:
+            format_name = _preamble_format(backend, session)
+            run = 0
+            while True:
+                run += 1
+                log.info(f"Starting LaTeX compilation via {session.description} (Pass {run})...")
+                aux_before = _file_digest(temp_aux_file_host)
+                pass_started = time.perf_counter()
+                latex_args, env = _latex_command(backend, format_name, temp_tex_file_host)
+                process = session.run(latex_args, env)
+
+                if format_name and (process.returncode not in (0, 1) or not temp_pdf_file_host.exists()):
+                    log.warning(f"Compilation against format '{format_name}' failed (Pass {run}); retrying with the full preamble.")
+                    failed_format, format_name = format_name, None
+                    latex_args, env = _latex_command(backend, None, temp_tex_file_host)
+                    process = session.run(latex_args, env)
+                    if process.returncode in (0, 1) and temp_pdf_file_host.exists():
+                        # The document is fine, so the format is at fault
+                        _mark_format_unusable(backend, failed_format)
+                pass_times.append(time.perf_counter() - pass_started)
+
+                log_content = _read_log(temp_log_file_host)
+                # treat exit code 1 as warning if PDF was produced
+                if process.returncode not in (0, 1) or _has_fatal_error(log_content):
+                    log.error(f"LaTeX compilation failed (Pass {run})!")
+                    if log_content:
+                        log.debug(f"Log content from {temp_log_file_host}:\n{log_content}")
+                    raise LatexCompilationError(
+                        f"LaTeX compilation failed on pass {run}.",
+                        stdout=process.stdout, stderr=process.stderr, log_content=log_content
+                    )
+                elif process.returncode == 1 and temp_pdf_file_host.exists():
+                    log.warning(f"pdflatex returned code 1 on pass {run} but PDF exists; continuing.")
+                else:
+                    log.info(f"LaTeX compilation (Pass {run}) successful.")
+
+                # Another pass only helps if LaTeX asked for one and the
+                # auxiliary data it would read has actually changed.
+                if run >= max_passes:
+                    break
+                if not _requests_rerun(log_content) or _file_digest(temp_aux_file_host) == aux_before:
+                    break
+
+        _record_passes(pass_times)
+        log.info(
+            f"Compiled in {len(pass_times)} pass(es): "
+            f"{', '.join(f'{t:.2f}s' for t in pass_times)} (total {sum(pass_times):.2f}s)"
+        )
 
         if not temp_pdf_file_host.exists():
             raise RuntimeError(f"PDF file not found at {temp_pdf_file_host} after successful compilation steps.")
 
+        if pdf_cache is not None:
+            try:
+                pdf_cache.put_file(cache_key, temp_pdf_file_host)
+            except OSError as e:
+                log.warning(f"Could not store compiled PDF in cache: {e}")
+
         final_pdf_filename = f"{output_filename_base}_{uuid.uuid4()}.pdf"
         final_pdf_path = (output_dir / final_pdf_filename).resolve()
         log.info(f"Moving compiled PDF from {temp_pdf_file_host} to {final_pdf_path}")
@@ -126,8 +374,10 @@ def compile_latex_string_to_pdf(
         return final_pdf_path
 
     except FileNotFoundError as e:
-        log.exception(f"Error running subprocess - 'docker' command not found? {e}")
-        raise FileNotFoundError("Docker command not found. Ensure Docker is installed and accessible.") from e
+        log.exception(f"Error running subprocess - compiler command not found? {e}")
+        raise FileNotFoundError(
+            f"Command '{e.filename}' not found. Ensure the tools for LATEX_BACKEND={settings.LATEX_BACKEND} are installed."
+        ) from e
     except LatexCompilationError as e:
         log.error("--- LaTeX Compilation Failure Details ---")
         log.error(f"Error Message: {e}")
@@ -1,23 +1,123 @@
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.discovery import build_from_document
+from googleapiclient import discovery_cache
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.http import HttpRequest, MediaFileUpload, build_http
 from google.oauth2 import service_account
 from googleapiclient.http import MediaIoBaseDownload
 from googleapiclient.errors import HttpError
 import io
 import re
+import json
+import httplib2
 import os
+import shutil
+import socket
+import hashlib
 import logging
-from src.utils.inmemory import db
+import random
+import threading
+import time
+from typing import Dict, Iterable, Optional, Union
+from src.core.config import cache_dir, settings
+from src.utils.disk_cache import DiskCache
+from src.utils.metrics import cache_samples, registry, stat_samples
+from src.utils.file_ops import temp_file_path
 
 SCOPES = ['https://www.googleapis.com/auth/drive']
 CREDS_PATH = 'credentials.json'
+METADATA_FIELDS = 'id, name, mimeType, shared, md5Checksum, modifiedTime, size'
+PUBLIC_READER_PERMISSION = {
+    'type': 'anyone',
+    'role': 'reader',
+    'allowFileDiscovery': False
+}
+DRIVE_BATCH_LIMIT = 100  # Drive rejects batch requests with more calls
+UPLOAD_CHUNK_ALIGNMENT = 256 * 1024  # resumable chunks must be multiples of this
+# Statuses after which an upload chunk is retried on the same session
+RETRYABLE_UPLOAD_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+# The upload session is gone; the upload starts over
+EXPIRED_SESSION_STATUSES = frozenset({404, 410})
+# Errors from the connection itself; local file errors (missing file, no permission) are not retried
+UPLOAD_NETWORK_ERRORS = (socket.timeout, ConnectionError, httplib2.HttpLib2Error)
 
 log = logging.getLogger(__name__)
 
+_download_cache: Optional[DiskCache] = None
+_download_cache_lock = threading.Lock()
+
+def _get_download_cache() -> Optional[DiskCache]:
+    global _download_cache
+    if not settings.DRIVE_CACHE_ENABLED:
+        return None
+    if _download_cache is None:
+        with _download_cache_lock:
+            if _download_cache is None:
+                _download_cache = DiskCache(
+                    cache_dir("drive"),
+                    max_bytes=settings.DRIVE_CACHE_MAX_BYTES,
+                    suffix=".pdf",
+                )
+    return _download_cache
+
+def cache_stats() -> dict:
+    """Hit/miss counters of the download cache since startup."""
+    cache = _get_download_cache()
+    return cache.stats() if cache is not None else {"hits": 0, "misses": 0}
+
+def _download_cache_key(meta: dict) -> Optional[str]:
+    """Identifies one revision of a file; None if Drive gave no way to tell revisions apart."""
+    version = meta.get('md5Checksum') or meta.get('modifiedTime')
+    if not version:
+        return None
+    return hashlib.sha256(f"{meta['id']}:{version}".encode("utf-8")).hexdigest()
+
+_credentials = None
+_discovery_doc = None
+_client_lock = threading.Lock()
+_thread_local = threading.local()
+
+def _get_credentials():
+    """Service-account credentials shared by every thread, so one access token is reused until it expires."""
+    global _credentials
+    if _credentials is None:
+        with _client_lock:
+            if _credentials is None:
+                _credentials = service_account.Credentials.from_service_account_file(
+                    CREDS_PATH, scopes=SCOPES)
+    return _credentials
+
+def _get_discovery_doc() -> dict:
+    """The Drive v3 discovery document, loaded once from the copy bundled with the client library."""
+    global _discovery_doc
+    if _discovery_doc is None:
+        with _client_lock:
+            if _discovery_doc is None:
+                _discovery_doc = json.loads(discovery_cache.get_static_doc('drive', 'v3'))
+    return _discovery_doc
+
 def _get_drive_service():
-    creds = service_account.Credentials.from_service_account_file(
-        CREDS_PATH, scopes=SCOPES)
-    return build('drive', 'v3', credentials=creds)
+    """
+    Returns the calling thread's Drive client. httplib2 is not thread-safe, so
+    each thread keeps its own keep-alive connection, while credentials and the
+    discovery document are shared across the process.
+
+    With DRIVE_API_ENDPOINT set, requests go unauthenticated to that server
+    instead (e.g. a local fake Drive for tests).
+    """
+    service = getattr(_thread_local, 'service', None)
+    if service is None:
+        if settings.DRIVE_API_ENDPOINT:
+            # Re-rooting the document also moves upload URLs, which client_options would
+            # leave on https
+            root = settings.DRIVE_API_ENDPOINT.rstrip('/') + '/'
+            doc = {**_get_discovery_doc(), 'rootUrl': root, 'mtlsRootUrl': root}
+            service = build_from_document(doc, http=build_http())
+        else:
+            # build_http() keeps 308 (resumable upload progress) from being followed as a redirect
+            http = AuthorizedHttp(_get_credentials(), http=build_http())
+            service = build_from_document(_get_discovery_doc(), http=http)
+        _thread_local.service = service
+    return service
 
 
 def get_file_metadata(file_id: str) -> dict:
@@ -25,27 +125,17 @@ def get_file_metadata(file_id: str) -> dict:
     Fetches the metadata for a given file ID.
     """
     service = _get_drive_service()
-    return service.files().get(fileId=file_id, fields='id, name, mimeType, shared').execute()
+    return service.files().get(fileId=file_id, fields=METADATA_FIELDS).execute()
 
 
-def download_from_drive(cv_id: str, drive_url: str, dest_path: str) -> str:
-    """
-    Accepts a Google Drive share URL or file ID. Validates PDF type,
-    checks public access, and downloads to dest_path.
-    """
-    # Extract file ID
+def extract_file_id(drive_url: str) -> str:
+    """Returns the file ID from a Drive share URL, or the input if it already is an ID."""
     match = re.search(r'/d/([a-zA-Z0-9_-]+)', drive_url)
-    file_id = match.group(1) if match else drive_url
+    return match.group(1) if match else drive_url
 
-    service = _get_drive_service()
-    try:
-        meta = get_file_metadata(file_id)
-    except HttpError as e:
-        status = e.resp.status
-        if status in (403, 404):
-            raise PermissionError(f"Cannot access file {file_id}: HTTP {status}")
-        raise
 
+def _check_downloadable(meta: dict):
+    """Raises if the file is not a publicly shared PDF."""
     # Only allow PDFs
     if meta.get('mimeType') != 'application/pdf':
         raise ValueError(f"File '{meta.get('name')}' is not a PDF. Detected type: {meta.get('mimeType')}")
@@ -56,23 +146,251 @@ def download_from_drive(cv_id: str, drive_url: str, dest_path: str) -> str:
         # For now, reject
         raise PermissionError(f"File '{meta.get('name')}' is not shared publicly.")
 
+
+def _access_error(file_id: str, error: HttpError) -> Exception:
+    status = error.resp.status
+    if status in (403, 404):
+        return PermissionError(f"Cannot access file {file_id}: HTTP {status}")
+    return error
+
+
+def _execute_batch(requests: Dict[str, HttpRequest]) -> Dict[str, Union[dict, Exception]]:
+    """
+    Sends requests as Drive batch calls of up to DRIVE_BATCH_SIZE each and maps
+    every key to its response, or to the exception for that item alone.
+    """
+    service = _get_drive_service()
+    results: Dict[str, Union[dict, Exception]] = {}
+
+    def on_response(request_id, response, exception):
+        results[request_id] = exception if exception is not None else response
+
+    items = list(requests.items())
+    size = max(1, min(settings.DRIVE_BATCH_SIZE, DRIVE_BATCH_LIMIT))
+    for start in range(0, len(items), size):
+        batch = service.new_batch_http_request(callback=on_response)
+        for key, request in items[start:start + size]:
+            batch.add(request, request_id=key)
+        batch.execute()
+    return results
+
+
+def get_files_metadata(file_ids: Iterable[str]) -> Dict[str, Union[dict, Exception]]:
+    """
+    Fetches metadata for many files in a few batch round trips. Each ID maps
+    to its metadata if it is a downloadable (public PDF) file, else to the
+    exception download_from_drive would have raised for it.
+    """
+    service = _get_drive_service()
+    requests = {
+        file_id: service.files().get(fileId=file_id, fields=METADATA_FIELDS)
+        for file_id in dict.fromkeys(file_ids)
+    }
+    results = {}
+    for file_id, outcome in _execute_batch(requests).items():
+        if isinstance(outcome, HttpError):
+            outcome = _access_error(file_id, outcome)
+        elif not isinstance(outcome, Exception):
+            try:
+                _check_downloadable(outcome)
+            except (ValueError, PermissionError) as e:
+                outcome = e
+        results[file_id] = outcome
+    return results
+
+
+def share_publicly(file_ids: Iterable[str]) -> Dict[str, Optional[Exception]]:
+    """Grants 'anyone' read access to many files in batch calls; maps each ID to its error, if any."""
+    service = _get_drive_service()
+    requests = {
+        file_id: service.permissions().create(fileId=file_id, body=PUBLIC_READER_PERMISSION)
+        for file_id in dict.fromkeys(file_ids)
+    }
+    results = {}
+    for file_id, outcome in _execute_batch(requests).items():
+        if isinstance(outcome, Exception):
+            log.warning(f"Could not set public permission for {file_id}: {outcome}")
+            results[file_id] = outcome
+        else:
+            results[file_id] = None
+    return results
+
+
+def download_from_drive(cv_id: str, drive_url: str, dest_path: Optional[str] = None, meta: Optional[dict] = None) -> Union[bytes, str]:
+    """
+    Accepts a Google Drive share URL or file ID. Validates PDF type,
+    checks public access, and downloads it.
+
+    With `dest_path` the file is written there and the path is returned.
+    Without it, files up to DRIVE_IN_MEMORY_MAX_BYTES are returned as bytes
+    and larger ones are written to a new temp file whose path is returned.
+    Pass `meta` from get_files_metadata to skip the per-file metadata request.
+    """
+    file_id = extract_file_id(drive_url)
+
+    service = _get_drive_service()
+    if meta is None:
+        try:
+            meta = get_file_metadata(file_id)
+        except HttpError as e:
+            raise _access_error(file_id, e)
+
+    _check_downloadable(meta)
+
+    size = int(meta.get('size') or 0)
+    in_memory = dest_path is None and 0 < size <= settings.DRIVE_IN_MEMORY_MAX_BYTES
+
+    # An unchanged file costs only the metadata request above
+    cache = _get_download_cache()
+    cache_key = _download_cache_key(meta) if cache is not None else None
+    if cache_key:
+        if in_memory:
+            data = cache.get_bytes(cache_key)
+            if data is not None:
+                log.info(f"Served Drive file {file_id} from download cache")
+                return data
+        else:
+            cached = cache.get_path(cache_key)
+            if cached is not None:
+                dest_path = dest_path or temp_file_path(suffix='.pdf')
+                try:
+                    shutil.copyfile(cached, dest_path)
+                    log.info(f"Served Drive file {file_id} from download cache")
+                    return dest_path
+                except OSError as e:
+                    log.warning(f"Could not copy cached download {cached}: {e}")
+
     request = service.files().get_media(fileId=file_id)
-    fh = io.FileIO(dest_path, 'wb')
-    downloader = MediaIoBaseDownload(fh, request)
+    if in_memory:
+        buffer = io.BytesIO()
+        _fetch_media(request, buffer)
+        data = buffer.getvalue()
+        if cache_key:
+            try:
+                cache.put_bytes(cache_key, data)
+            except OSError as e:
+                log.warning(f"Could not store download of {file_id} in cache: {e}")
+        return data
 
-    done = False
-    while not done:
-        status, done = downloader.next_chunk()
-    fh.close()
+    owns_dest = dest_path is None
+    dest_path = dest_path or temp_file_path(suffix='.pdf')
+    try:
+        with io.FileIO(dest_path, 'wb') as fh:
+            _fetch_media(request, fh)
+    except Exception:
+        # Do not leave a partial temp file behind
+        if owns_dest:
+            try:
+                os.remove(dest_path)
+            except OSError:
+                pass
+        raise
     if not os.path.exists(dest_path):
-        db.set(f"{cv_id}", {
-            "status": "failed",
-        })
         raise Exception("PDF download failed.")
+    if cache_key:
+        try:
+            cache.put_file(cache_key, dest_path)
+        except OSError as e:
+            log.warning(f"Could not store download of {file_id} in cache: {e}")
     return dest_path
 
-def upload_to_drive(cv_id: str, file_path: str, drive_name: str = None, mime_type: str = None) -> str:
-    # Upload a file to Drive, allowing a custom name and MIME type
+def _fetch_media(request, fh):
+    downloader = MediaIoBaseDownload(fh, request)
+    done = False
+    while not done:
+        status, done = downloader.next_chunk()
+
+_upload_stats = {"uploads": 0, "bytes": 0, "seconds": 0.0, "chunks": 0, "retries": 0, "restarts": 0}
+_upload_stats_lock = threading.Lock()
+
+def _record_upload(size: int, seconds: float, chunks: int, retries: int, restarts: int):
+    with _upload_stats_lock:
+        _upload_stats["uploads"] += 1
+        _upload_stats["bytes"] += size
+        _upload_stats["seconds"] += seconds
+        _upload_stats["chunks"] += chunks
+        _upload_stats["retries"] += retries
+        _upload_stats["restarts"] += restarts
+
+def upload_stats() -> dict:
+    """Returns counts and throughput of finished uploads since startup."""
+    with _upload_stats_lock:
+        stats = dict(_upload_stats)
+    stats["bytes_per_second"] = stats["bytes"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+registry.callback("cvforge_drive_uploads_total", "Files uploaded to Drive.", "counter",
+                  stat_samples(upload_stats, "uploads"))
+registry.callback("cvforge_drive_upload_bytes_total", "Bytes uploaded to Drive.", "counter",
+                  stat_samples(upload_stats, "bytes"))
+registry.callback("cvforge_drive_upload_seconds_total", "Time spent uploading to Drive.", "counter",
+                  stat_samples(upload_stats, "seconds"))
+registry.callback("cvforge_drive_upload_retries_total", "Upload chunks resumed after an error.", "counter",
+                  stat_samples(upload_stats, "retries"))
+registry.callback("cvforge_drive_download_cache_requests_total", "Download cache lookups by result.", "counter",
+                  cache_samples(cache_stats))
+
+def _upload_chunk_size() -> int:
+    """DRIVE_UPLOAD_CHUNK_BYTES rounded down to a multiple of 256 KiB (-1 sends the file in one request)."""
+    if settings.DRIVE_UPLOAD_CHUNK_BYTES < 0:
+        return -1
+    return max(UPLOAD_CHUNK_ALIGNMENT, settings.DRIVE_UPLOAD_CHUNK_BYTES // UPLOAD_CHUNK_ALIGNMENT * UPLOAD_CHUNK_ALIGNMENT)
+
+def _upload_retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """Seconds to wait before resuming after `error`, or None if it should not be retried."""
+    if isinstance(error, HttpError) and error.resp.status not in RETRYABLE_UPLOAD_STATUSES:
+        return None
+    if attempt >= settings.DRIVE_UPLOAD_MAX_RETRIES:
+        return None
+    delay = min(settings.DRIVE_UPLOAD_RETRY_MAX_SECONDS, settings.DRIVE_UPLOAD_RETRY_BASE_SECONDS * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0)
+
+def _upload_resumable(service, file_path: str, file_metadata: dict, mime_type: str) -> dict:
+    """
+    Uploads the file in a resumable session, one chunk per request. After a
+    network error or a retryable HTTP status the upload resumes from the last
+    byte the session acknowledged instead of re-sending the file; only an
+    expired session starts the upload over.
+    """
+    size = os.path.getsize(file_path)
+
+    def new_request():
+        media = MediaFileUpload(file_path, mimetype=mime_type, chunksize=_upload_chunk_size(), resumable=True)
+        return service.files().create(body=file_metadata, media_body=media, fields='id')
+
+    request = new_request()
+    response = None
+    chunks = retries = restarts = attempt = 0
+    start = time.monotonic()
+    while response is None:
+        try:
+            # The request keeps the session URI and acknowledged offset between calls
+            _, response = request.next_chunk()
+            chunks += 1
+            attempt = 0
+        except (HttpError,) + UPLOAD_NETWORK_ERRORS as e:
+            # A 404 before the session exists is an ordinary error, not an expired session
+            expired = isinstance(e, HttpError) and e.resp.status in EXPIRED_SESSION_STATUSES and request.resumable_uri is not None
+            if expired and restarts < settings.DRIVE_UPLOAD_MAX_RETRIES:
+                log.warning(f"Upload session for {file_path} expired, starting over")
+                request = new_request()
+                restarts += 1
+                continue
+            delay = _upload_retry_delay(e, attempt)
+            if delay is None:
+                raise
+            attempt += 1
+            retries += 1
+            log.warning(f"Upload of {file_path} interrupted at byte {request.resumable_progress} ({e}); resuming in {delay:.1f}s")
+            time.sleep(delay)
+    seconds = time.monotonic() - start
+    _record_upload(size, seconds, chunks, retries, restarts)
+    log.info(f"Uploaded {file_path} ({size} bytes) in {seconds:.2f}s, {chunks} chunks, {retries} retries")
+    return response
+
+def upload_to_drive(cv_id: str, file_path: str, drive_name: str = None, mime_type: str = None, share: bool = True) -> str:
+    # Upload a file to Drive, allowing a custom name and MIME type.
+    # With share=False the caller grants public access later, e.g. via share_publicly.
     service = _get_drive_service()
     # Determine file name: use provided name or default to local file name
     name = drive_name or os.path.basename(file_path)
@@ -81,24 +399,18 @@ def upload_to_drive(cv_id: str, file_path: str, drive_name: str = None, mime_typ
         ext = os.path.splitext(name)[1].lower()
         mime_type = 'text/csv' if ext == '.csv' else 'application/pdf'
     file_metadata = {'name': name}
-    media = MediaFileUpload(file_path, mimetype=mime_type)
-    file = service.files().create(body=file_metadata, media_body=media, fields='id').execute()
+    file = _upload_resumable(service, file_path, file_metadata, mime_type)
 
     file_id = file.get('id')
     if not file_id:
-        db.set(f"{cv_id}", {
-            "status": "failed",
-        })
         raise Exception("PDF upload failed.")
+    if not share:
+        return f"https://drive.google.com/file/d/{file_id}/view?usp=sharing"
     # make the file publicly readable
     try:
         service.permissions().create(
             fileId=file_id,
-            body={
-                'type': 'anyone',
-                'role': 'reader',
-                'allowFileDiscovery': False
-            }
+            body=PUBLIC_READER_PERMISSION
         ).execute()
         log.info(f"Set public 'anyone' reader permission on file {file_id}")
     except HttpError as e:
@@ -0,0 +1,174 @@
+import logging
+import os
+import shutil
+import subprocess
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from src.core.config import PROJECT_ROOT, settings
+from src.services import latex_pool
+
+log = logging.getLogger(__name__)
+
+# Where docker-compose.yml mounts the project inside the compiler container
+CONTAINER_ROOT = Path("/app")
+
+
+class LatexSession(ABC):
+    """Runs the commands of one compilation; all passes of a document share a session."""
+    def __init__(self, description: str):
+        self.description = description
+
+    @abstractmethod
+    def run(self, args: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+        """Runs a TeX command (e.g. one pdflatex pass) with extra environment variables."""
+
+
+class CompilerBackend(ABC):
+    """
+    Where pdflatex runs. Commands refer to files under the project root
+    through path(), since a container sees the project at a different path
+    than the host does.
+    """
+    # Precompiled formats only load in the TeX build that dumped them, so
+    # backends sharing a TeX install share a format family.
+    format_family = "default"
+
+    def start(self):
+        """Prepares the backend ahead of the first compilation; optional."""
+
+    def shutdown(self):
+        """Releases what start() or compilations set up."""
+
+    def path(self, host_path: Path) -> str:
+        """`host_path` (under the project root) as the compiler process sees it."""
+        return str(host_path)
+
+    @abstractmethod
+    @contextmanager
+    def session(self) -> Iterator[LatexSession]:
+        """Yields a session for one compilation."""
+
+
+def _search_path(bin_dir: str) -> Optional[str]:
+    """PATH with `bin_dir` in front, or None for the unchanged PATH."""
+    return f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}" if bin_dir else None
+
+
+def _completed(cmd: List[str], **kwargs) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        cmd, capture_output=True, text=True, encoding='utf-8',
+        stdin=subprocess.DEVNULL, check=False, **kwargs
+    )
+
+
+class _NativeSession(LatexSession):
+    def __init__(self, bin_dir: str):
+        super().__init__("local TeX installation")
+        self._env = dict(os.environ)
+        if bin_dir:
+            self._env["PATH"] = _search_path(bin_dir)
+
+    def run(self, args: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+        return _completed(args, cwd=PROJECT_ROOT, env={**self._env, **(env or {})})
+
+
+class NativeBackend(CompilerBackend):
+    """Runs pdflatex from a TeX installation on this machine (or in the API image), without Docker."""
+    format_family = "native"
+
+    def __init__(self, bin_dir: str = ""):
+        self.bin_dir = bin_dir
+
+    def start(self):
+        if shutil.which("pdflatex", path=_search_path(self.bin_dir)) is None:
+            log.warning("pdflatex was not found on PATH; native LaTeX compilations will fail.")
+
+    @contextmanager
+    def session(self) -> Iterator[LatexSession]:
+        yield _NativeSession(self.bin_dir)
+
+
+class _DockerRunSession(LatexSession):
+    def __init__(self, service_name: str):
+        super().__init__(f"Docker service '{service_name}'")
+        self.service_name = service_name
+
+    def run(self, args: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+        cmd = [
+            "docker", "compose", "run", "--rm",
+            "--user", f"{os.getuid()}:{os.getgid()}",
+        ]
+        for key, value in (env or {}).items():
+            cmd += ["-e", f"{key}={value}"]
+        cmd += [self.service_name] + args
+        log.debug(f"Executing command: {' '.join(map(str, cmd))}")
+        return _completed(cmd, cwd=PROJECT_ROOT)
+
+
+class DockerRunBackend(CompilerBackend):
+    """Starts a throwaway `docker compose run --rm` container for every command."""
+    format_family = "docker"
+
+    def __init__(self, service_name: str):
+        self.service_name = service_name
+
+    def path(self, host_path: Path) -> str:
+        return str(CONTAINER_ROOT / host_path.relative_to(PROJECT_ROOT))
+
+    @contextmanager
+    def session(self) -> Iterator[LatexSession]:
+        yield _DockerRunSession(self.service_name)
+
+
+class _PoolSession(LatexSession):
+    def __init__(self, pool: latex_pool.LatexWorkerPool, worker: latex_pool.LatexWorker):
+        super().__init__(f"warm worker '{worker.container_name}'")
+        self._pool = pool
+        self._worker = worker
+
+    def run(self, args: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+        return self._pool.run(self._worker, args, env=env)
+
+
+class DockerPoolBackend(DockerRunBackend):
+    """Checks out one of LATEX_POOL_SIZE long-lived compiler containers per compilation."""
+    def __init__(self, service_name: str, size: int, health_interval: float):
+        super().__init__(service_name)
+        self.size = size
+        self.health_interval = health_interval
+
+    def _pool(self) -> latex_pool.LatexWorkerPool:
+        return latex_pool.get_pool(self.size, self.service_name, PROJECT_ROOT, self.health_interval)
+
+    def start(self):
+        self._pool()
+
+    def shutdown(self):
+        latex_pool.shutdown_pool()
+
+    @contextmanager
+    def session(self) -> Iterator[LatexSession]:
+        pool = self._pool()
+        with pool.worker() as worker:
+            yield _PoolSession(pool, worker)
+
+
+def create_backend() -> CompilerBackend:
+    """
+    Builds the backend selected by LATEX_BACKEND: "native", "docker" (a
+    container per command), "pool" (warm containers; "docker" when
+    LATEX_POOL_SIZE is 0) or "auto" (native if pdflatex is installed, else pool).
+    """
+    backend = settings.LATEX_BACKEND.lower()
+    if backend == "auto":
+        backend = "native" if shutil.which("pdflatex", path=_search_path(settings.LATEX_NATIVE_BIN_DIR)) else "pool"
+    if backend == "native":
+        return NativeBackend(settings.LATEX_NATIVE_BIN_DIR)
+    if backend == "pool" and settings.LATEX_POOL_SIZE > 0:
+        return DockerPoolBackend(settings.latex_service, settings.LATEX_POOL_SIZE, settings.LATEX_POOL_HEALTH_INTERVAL)
+    if backend in ("pool", "docker"):
+        return DockerRunBackend(settings.latex_service)
+    raise ValueError(f"Unknown LATEX_BACKEND: {settings.LATEX_BACKEND}")
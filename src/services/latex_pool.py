@@ -0,0 +1,181 @@
+import atexit
+import logging
+import os
+import queue
+import re
+import subprocess
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.utils.metrics import registry
+
+log = logging.getLogger(__name__)
+
+# `docker exec` exit codes that mean the container, not pdflatex, failed.
+_DOCKER_FAILURE_CODES = (125, 126, 127, 137)
+# The docker CLI exits 1 (like a pdflatex warning) when the container is gone
+# or stopped, so those cases are told apart by the daemon's message.
+_DOCKER_FAILURE_MESSAGE = re.compile(r"No such container|is not running|Error response from daemon")
+
+
+def _container_failed(process: subprocess.CompletedProcess) -> bool:
+    if process.returncode in _DOCKER_FAILURE_CODES:
+        return True
+    return process.returncode != 0 and bool(_DOCKER_FAILURE_MESSAGE.search(process.stderr or ""))
+
+
+class LatexWorker:
+    """A long-lived compiler container that runs pdflatex jobs via `docker exec`."""
+    def __init__(self, service_name: str, project_root: Path):
+        self.service_name = service_name
+        self.project_root = project_root
+        self.container_name = f"{service_name}_worker_{uuid.uuid4().hex[:8]}"
+
+    def start(self):
+        log.info(f"Starting warm LaTeX worker container '{self.container_name}'")
+        cmd = [
+            "docker", "compose", "run", "-d", "--rm",
+            "--name", self.container_name,
+            "--user", f"{os.getuid()}:{os.getgid()}",
+            self.service_name,
+            "tail", "-f", "/dev/null",
+        ]
+        subprocess.run(cmd, capture_output=True, text=True, cwd=self.project_root, check=True)
+
+    def stop(self):
+        subprocess.run(
+            ["docker", "rm", "-f", self.container_name],
+            capture_output=True, text=True, check=False,
+        )
+
+    def restart(self):
+        log.warning(f"Restarting LaTeX worker container '{self.container_name}'")
+        self.stop()
+        self.container_name = f"{self.service_name}_worker_{uuid.uuid4().hex[:8]}"
+        self.start()
+
+    def is_healthy(self) -> bool:
+        process = subprocess.run(
+            ["docker", "inspect", "-f", "{{.State.Running}}", self.container_name],
+            capture_output=True, text=True, check=False,
+        )
+        return process.returncode == 0 and process.stdout.strip() == "true"
+
+    def exec(self, args: List[str], workdir: str = "/app", env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+        cmd = ["docker", "exec", "-w", workdir]
+        for key, value in (env or {}).items():
+            cmd += ["-e", f"{key}={value}"]
+        cmd += [self.container_name] + list(args)
+        return subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', check=False)
+
+
+class LatexWorkerPool:
+    """
+    Fixed-size pool of warm compiler containers. Jobs check a worker out, run
+    their pdflatex passes in it and hand it back, so container startup is paid
+    once per worker instead of once per pass. A monitor thread restarts idle
+    workers whose container has died.
+    """
+    def __init__(self, size: int, service_name: str, project_root: Path, health_interval: float = 30.0):
+        self.size = size
+        self.service_name = service_name
+        self.project_root = project_root
+        self.health_interval = health_interval
+        self._idle: "queue.Queue[LatexWorker]" = queue.Queue()
+        self._workers: List[LatexWorker] = []
+        self._closed = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+    def start(self):
+        try:
+            for _ in range(self.size):
+                worker = LatexWorker(self.service_name, self.project_root)
+                self._workers.append(worker)
+                worker.start()
+                self._idle.put(worker)
+        except Exception:
+            self.close()
+            raise
+        self._monitor = threading.Thread(target=self._watch, name="latex-pool-monitor", daemon=True)
+        self._monitor.start()
+        log.info(f"LaTeX worker pool started with {self.size} container(s)")
+
+    def close(self):
+        self._closed.set()
+        for worker in self._workers:
+            worker.stop()
+        self._workers.clear()
+
+    def idle_workers(self) -> int:
+        return self._idle.qsize()
+
+    @contextmanager
+    def worker(self):
+        """Checks out a worker for the duration of one compilation."""
+        worker = self._idle.get()
+        try:
+            yield worker
+        finally:
+            self._idle.put(worker)
+
+    def run(self, worker: LatexWorker, args: List[str], workdir: str = "/app", env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+        """Runs a command in `worker`, restarting the container once if it has crashed."""
+        process = worker.exec(args, workdir, env)
+        if _container_failed(process) and not worker.is_healthy():
+            worker.restart()
+            process = worker.exec(args, workdir, env)
+        return process
+
+    def _watch(self):
+        while not self._closed.wait(self.health_interval):
+            # Only idle workers are checked; busy ones are checked on failure.
+            for _ in range(self._idle.qsize()):
+                try:
+                    worker = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    if not worker.is_healthy():
+                        worker.restart()
+                except Exception as e:
+                    log.error(f"Health check failed for '{worker.container_name}': {e}")
+                finally:
+                    self._idle.put(worker)
+
+
+_pool: Optional[LatexWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(size: int, service_name: str, project_root: Path, health_interval: float = 30.0) -> LatexWorkerPool:
+    """Returns the process-wide worker pool, starting it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = LatexWorkerPool(size, service_name, project_root, health_interval)
+                pool.start()
+                atexit.register(pool.close)
+                _pool = pool
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def _worker_samples():
+    pool = _pool
+    if pool is None:
+        return
+    idle = pool.idle_workers()
+    yield {"state": "idle"}, idle
+    yield {"state": "busy"}, max(0, pool.size - idle)
+
+registry.callback("cvforge_latex_workers", "Warm LaTeX compiler containers by state.", "gauge", _worker_samples)
@@ -1,29 +1,33 @@
-from src.models.dtos import CVSchema
-from langchain.chains import LLMChain
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_google_genai.chat_models import ChatGoogleGenerativeAIError
 from langchain_core.prompts import PromptTemplate
-
-# --- Corrected Function ---
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import PromptTemplate
-# Removed the erroneous import
 from src.models.dtos import CVSchema
+from src.core.config import cache_dir, settings
+from src.utils.disk_cache import DiskCache
+from src.utils.metrics import cache_samples, registry, stat_samples
+from src.utils.ratelimit import TokenBucket
+from pydantic import ValidationError
+from contextlib import contextmanager
+from typing import Optional
+import hashlib
 import json
+import logging
+import random
+import re
+import threading
+import time
 
-def extract_structured_data(raw_text: str) -> CVSchema:
-    # 1) Initialize and wrap LLM
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.0-flash",
-        # temperature=0.0,
-        max_output_tokens=4096,
-    )
-    model_with_schema = llm.with_structured_output(CVSchema)
-
-    # 2) Build prompt (inject the JSON schema automatically for clarity)
-    schema_json = json.dumps(CVSchema.model_json_schema(), indent=2)
-    prompt = PromptTemplate(
-        input_variables=["raw_text", "schema_json"],
-        template="""
+log = logging.getLogger(__name__)
+
+LLM_MODEL = "gemini-2.0-flash"
+
+# Changes whenever CVSchema changes, so cached extractions for an older
+# schema are never returned.
+SCHEMA_VERSION = hashlib.sha256(
+    json.dumps(CVSchema.model_json_schema(), sort_keys=True).encode("utf-8")
+).hexdigest()[:16]
+
+_PROMPT_TEMPLATE = """
 Extract information from the CV text below and format it strictly according to the json schema.
 Output exactly the JSON matching this schema without any '```' json or any text. You should account the nested json structure as well.
 
@@ -32,15 +36,219 @@ CV TEXT:
 
 OUTPUT JSON SCHEMA:
 {schema_json}
-""".strip(),
-    )
+""".strip()
+
+# Compact separators: the indented form only cost input tokens
+_SCHEMA_JSON = json.dumps(CVSchema.model_json_schema(), separators=(",", ":"))
+
+class LLMExtractionError(Exception):
+    """Gemini answered, but without data matching CVSchema."""
+
+_cache: Optional[DiskCache] = None
+_cache_lock = threading.Lock()
+
+def _get_cache() -> Optional[DiskCache]:
+    global _cache
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DiskCache(
+                    cache_dir("llm"),
+                    max_bytes=settings.LLM_CACHE_MAX_BYTES,
+                    ttl=settings.LLM_CACHE_TTL_SECONDS or None,
+                    suffix=".json",
+                )
+    return _cache
+
+def _cache_key(raw_text: str) -> str:
+    # Whitespace differences between two parses of the same CV do not matter
+    normalized = " ".join(raw_text.split())
+    digest = hashlib.sha256()
+    for part in (LLM_MODEL, SCHEMA_VERSION, normalized):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def cache_stats() -> dict:
+    """Hit/miss counters of the extraction cache since startup."""
+    cache = _get_cache()
+    return cache.stats() if cache is not None else {"hits": 0, "misses": 0}
+
+def _cached(key: str) -> Optional[CVSchema]:
+    cache = _get_cache()
+    if cache is None:
+        return None
+    cached = cache.get_bytes(key)
+    if cached is None:
+        return None
+    try:
+        parsed = CVSchema.model_validate_json(cached)
+        log.info(f"LLM extraction served from cache ({key[:12]})")
+        return parsed
+    except ValidationError:
+        log.warning(f"Discarding invalid cached extraction {key[:12]}")
+        cache.delete(key)
+        return None
+
+def _store(key: str, parsed: CVSchema):
+    cache = _get_cache()
+    if cache is None:
+        return
+    try:
+        cache.put_bytes(key, parsed.model_dump_json().encode("utf-8"))
+    except OSError as e:
+        log.warning(f"Could not store extraction in cache: {e}")
+
+def extract_structured_data(raw_text: str) -> CVSchema:
+    key = _cache_key(raw_text)
+    parsed = _cached(key)
+    if parsed is not None:
+        return parsed
 
-    # 3) Compose chain and invoke using LLMChain
-    chain = prompt | model_with_schema
-    input_data = {
-        "raw_text": raw_text,
-        "schema_json": schema_json,
-    }
-    parsed: CVSchema = chain.invoke(input=input_data)
+    chain = _get_chain()
+    input_data = {"raw_text": raw_text}
+    tokens = estimate_tokens(raw_text) + _PROMPT_OVERHEAD_TOKENS
+    for attempt in range(settings.LLM_MAX_RETRIES + 1):
+        with _request_slot(tokens):
+            try:
+                parsed: Optional[CVSchema] = chain.invoke(input=input_data)
+                break
+            except Exception as e:
+                delay = _retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                error = e
+        log.warning(f"Gemini request failed ({error}); retrying in {delay:.1f}s")
+        time.sleep(delay)
 
+    # The structured-output parser returns None when the reply has no usable tool call
+    if parsed is None:
+        raise LLMExtractionError("The LLM returned no structured data for this CV.")
+    _store(key, parsed)
     return parsed
+
+# --- Client-side limits ---
+# One process-wide concurrency limit plus token buckets for the requests-per-
+# minute and tokens-per-minute quotas, so batch jobs run at a steady rate just
+# under the quota instead of alternating between bursts and 429s.
+
+# Size of the instructions and JSON schema sent along with the CV text
+_PROMPT_OVERHEAD_TOKENS = len(_PROMPT_TEMPLATE + _SCHEMA_JSON) // 4 + 1
+
+_concurrency = threading.BoundedSemaphore(max(1, settings.LLM_MAX_CONCURRENCY))
+
+def _bucket(per_minute: int) -> Optional[TokenBucket]:
+    if per_minute <= 0:
+        return None
+    rate = per_minute * settings.LLM_QUOTA_HEADROOM / 60.0
+    return TokenBucket(capacity=rate * settings.LLM_BURST_SECONDS, rate=rate)
+
+_request_bucket = _bucket(settings.LLM_REQUESTS_PER_MINUTE)
+_token_bucket = _bucket(settings.LLM_TOKENS_PER_MINUTE)
+
+_wait_stats = {"requests": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+_wait_stats_lock = threading.Lock()
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token for Gemini)."""
+    return len(text) // 4 + 1
+
+def _record_wait(seconds: float):
+    with _wait_stats_lock:
+        _wait_stats["requests"] += 1
+        _wait_stats["wait_seconds"] += seconds
+        _wait_stats["max_wait_seconds"] = max(_wait_stats["max_wait_seconds"], seconds)
+
+def queue_stats() -> dict:
+    """How long requests waited for a concurrency slot and rate-limit tokens."""
+    with _wait_stats_lock:
+        stats = dict(_wait_stats)
+    stats["avg_wait_seconds"] = stats["wait_seconds"] / stats["requests"] if stats["requests"] else 0.0
+    return stats
+
+registry.callback("cvforge_llm_requests_total", "LLM requests sent.", "counter",
+                  stat_samples(queue_stats, "requests"))
+registry.callback("cvforge_llm_queue_wait_seconds_total", "Time LLM requests waited for a concurrency slot and rate-limit tokens.",
+                  "counter", stat_samples(queue_stats, "wait_seconds"))
+registry.callback("cvforge_llm_cache_requests_total", "Extraction cache lookups by result.", "counter",
+                  cache_samples(cache_stats))
+
+@contextmanager
+def _request_slot(tokens: int):
+    started = time.perf_counter()
+    _concurrency.acquire()
+    try:
+        if _request_bucket is not None:
+            _request_bucket.acquire(1)
+        if _token_bucket is not None:
+            _token_bucket.acquire(tokens)
+        _record_wait(time.perf_counter() - started)
+        yield
+    finally:
+        _concurrency.release()
+
+# "Error calling model 'gemini-2.0-flash' (RESOURCE_EXHAUSTED): 429 RESOURCE_EXHAUSTED. {...}"
+_WRAPPED_STATUS = re.compile(r"Error calling model '[^']*' \([^)]*\): (\d{3})\b")
+
+def _status_code(error: Exception) -> Optional[int]:
+    """HTTP status of a failed Gemini call, read from the error or the google.genai error it wraps."""
+    chain = []
+    current: Optional[BaseException] = error
+    while current is not None and current not in chain:
+        chain.append(current)
+        current = current.__cause__
+    for link in chain:
+        for attr in ("code", "status_code"):
+            value = getattr(link, attr, None)
+            if isinstance(value, int) and not isinstance(value, bool):
+                return value
+    for link in chain:
+        if isinstance(link, ChatGoogleGenerativeAIError):
+            # Only the message prefix is trusted; the rest may quote CV text
+            match = _WRAPPED_STATUS.match(str(link))
+            if match:
+                return int(match.group(1))
+    return None
+
+def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """Backoff before the next attempt, or None if the error is not worth retrying."""
+    status = _status_code(error)
+    if attempt >= settings.LLM_MAX_RETRIES or status is None:
+        return None
+    if status != 429 and not 500 <= status < 600:
+        return None
+    delay = min(settings.LLM_RETRY_MAX_SECONDS, settings.LLM_RETRY_BASE_SECONDS * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0)
+
+_chain = None
+_chain_lock = threading.Lock()
+
+def _get_chain():
+    """
+    Returns the prompt | model chain, built once per process. Runnables keep
+    no per-call state, so the same chain is shared by all threads.
+    """
+    global _chain
+    if _chain is None:
+        with _chain_lock:
+            if _chain is None:
+                # 1) Initialize and wrap LLM
+                llm = ChatGoogleGenerativeAI(
+                    model=LLM_MODEL,
+                    # temperature=0.0,
+                    max_output_tokens=4096,
+                    max_retries=1,  # no SDK retries; see _retry_delay
+                )
+                model_with_schema = llm.with_structured_output(CVSchema)
+
+                # 2) Build prompt with the JSON schema filled in up front
+                prompt = PromptTemplate(
+                    input_variables=["raw_text", "schema_json"],
+                    template=_PROMPT_TEMPLATE,
+                ).partial(schema_json=_SCHEMA_JSON)
+
+                # 3) Compose chain
+                _chain = prompt | model_with_schema
+    return _chain
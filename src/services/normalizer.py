@@ -0,0 +1,104 @@
+import logging
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from src.core.config import settings
+from src.services.llm import estimate_tokens
+
+log = logging.getLogger(__name__)
+
+# "3", "- 3 -", "3 of 5", "Page 3", "Page 3/5". Four-digit lines are left alone: they are usually years.
+# Only matched in the outermost PAGE_NUMBER_EDGE_LINES lines of a page, since a bare number in the body is content.
+_PAGE_NUMBER = re.compile(
+    r"^[-–\s]*(page\s*\d{1,3}(\s*(of|/)\s*\d{1,3})?|\d{1,3}(\s+of\s+\d{1,3})?)[-–\s]*$",
+    re.IGNORECASE,
+)
+PAGE_NUMBER_EDGE_LINES = 2
+# Fewer pages than this cannot tell a running header from a line the CV repeats
+MIN_PAGES_FOR_REPEATED_LINES = 3
+# Up to this many pages a header or footer must be on every page
+SHORT_DOCUMENT_PAGES = 4
+
+
+def _edge_positions(lines: List[str]) -> Dict[int, Tuple[str, int]]:
+    """
+    Maps the indexes of the first and last NORMALIZE_EDGE_LINES non-blank
+    lines to their position: ("head", n) for the n-th line from the top,
+    ("tail", n) for the n-th from the bottom.
+    """
+    count = settings.NORMALIZE_EDGE_LINES
+    if count <= 0:
+        return {}
+    filled = [i for i, line in enumerate(lines) if line]
+    edges = {i: ("tail", n) for n, i in enumerate(reversed(filled[-count:]))}
+    edges.update({i: ("head", n) for n, i in enumerate(filled[:count])})
+    return edges
+
+
+def _min_pages(page_count: int) -> int:
+    """Pages a line must repeat on, at the same position, to count as a header or footer."""
+    if page_count <= SHORT_DOCUMENT_PAGES:
+        return page_count
+    return max(2, math.ceil(settings.NORMALIZE_REPEATED_LINE_RATIO * page_count))
+
+
+def normalize_pages(pages: List[str], cv_id: Optional[str] = None) -> str:
+    """
+    Shrinks extracted PDF text before it is sent to the LLM: collapses
+    whitespace, drops page numbers and lines repeated at the top or bottom
+    of pages (headers, footers), and caps the length. Which steps run is
+    controlled by the NORMALIZE_* settings.
+    """
+    raw = "".join(pages)
+    if not settings.NORMALIZE_ENABLED:
+        return raw
+
+    page_lines = [[" ".join(line.split()) for line in page.splitlines()] for page in pages]
+    page_edges = [_edge_positions(lines) for lines in page_lines]
+
+    repeated = set()
+    if settings.NORMALIZE_DROP_REPEATED_LINES and len(page_lines) >= MIN_PAGES_FOR_REPEATED_LINES:
+        # A line at the same distance from the top (or bottom) of enough pages is
+        # a header (or footer); keep only its first occurrence
+        min_pages = _min_pages(len(page_lines))
+        seen_on = Counter(
+            key for lines, edges in zip(page_lines, page_edges)
+            for key in {(edge, lines[i]) for i, edge in edges.items()}
+        )
+        repeated = {key for key, count in seen_on.items() if count >= min_pages}
+
+    kept = []
+    emitted = set()
+    for lines, edges in zip(page_lines, page_edges):
+        previous = None
+        for i, line in enumerate(lines):
+            if not line:
+                # Keep at most one blank line as a section break
+                if kept and kept[-1]:
+                    kept.append("")
+                previous = None
+                continue
+            edge = edges.get(i)
+            if edge and edge[1] < PAGE_NUMBER_EDGE_LINES and settings.NORMALIZE_DROP_PAGE_NUMBERS and _PAGE_NUMBER.match(line):
+                continue
+            if (edge, line) in repeated:
+                if (edge, line) in emitted:
+                    continue
+                emitted.add((edge, line))
+            if line == previous:
+                continue
+            kept.append(line)
+            previous = line
+
+    text = "\n".join(kept).strip()
+    max_chars = settings.NORMALIZE_MAX_CHARS
+    if max_chars and len(text) > max_chars:
+        cut = text.rfind("\n", 0, max_chars)
+        text = text[:cut if cut > 0 else max_chars]
+
+    before, after = estimate_tokens(raw), estimate_tokens(text)
+    saved = 100.0 * (before - after) / before if before else 0.0
+    log.info(f"Normalized CV text{f' for {cv_id}' if cv_id else ''}: ~{before} -> ~{after} input tokens ({saved:.0f}% saved)")
+    return text
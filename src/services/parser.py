@@ -1,8 +1,127 @@
 import fitz  # PyMuPDF
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, List, Optional, Union
 
-def parse_text(file_path: str) -> str:
-    text = ""
-    with fitz.open(file_path) as doc:
-        for page in doc:
-            text += page.get_text()
-    return text
+from src.core.config import settings
+
+log = logging.getLogger(__name__)
+
+PdfSource = Union[str, bytes, bytearray, memoryview, BinaryIO]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _open(source: PdfSource) -> fitz.Document:
+    """Opens a PDF from a file path, raw bytes or a binary buffer."""
+    if isinstance(source, str):
+        return fitz.open(source)
+    return fitz.open(stream=_as_picklable(source), filetype="pdf")
+
+def _as_picklable(source: PdfSource) -> Union[str, bytes]:
+    """Paths and bytes can be sent to worker processes; buffers are read first."""
+    if isinstance(source, str):
+        return source
+    if hasattr(source, "read"):
+        return source.read()
+    return bytes(source)
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork: the API process runs many threads
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.PARSER_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+def _extract_range(source: Union[str, bytes], start: int, stop: int) -> List[str]:
+    """Extracts the text of pages [start, stop); runs in a worker process."""
+    with _open(source) as doc:
+        return [doc[i].get_text() for i in range(start, stop)]
+
+def _truncate(pages: List[str], max_bytes: Optional[int]) -> List[str]:
+    """Keeps whole pages until `max_bytes` of UTF-8 text, cutting the last one short."""
+    if not max_bytes:
+        return pages
+    kept = []
+    remaining = max_bytes
+    for text in pages:
+        encoded = text.encode("utf-8")
+        if len(encoded) >= remaining:
+            kept.append(encoded[:remaining].decode("utf-8", errors="ignore"))
+            break
+        kept.append(text)
+        remaining -= len(encoded)
+    return kept
+
+def parse_pages(
+    source: PdfSource,
+    max_pages: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> List[str]:
+    """
+    Returns the text of each page, reading at most `max_pages` pages and
+    `max_bytes` bytes of text (PARSER_MAX_PAGES / PARSER_MAX_BYTES by default,
+    0 meaning no limit). Documents with at least PARSER_PARALLEL_MIN_PAGES
+    pages are split across a process pool.
+    """
+    max_pages = settings.PARSER_MAX_PAGES if max_pages is None else max_pages
+    max_bytes = settings.PARSER_MAX_BYTES if max_bytes is None else max_bytes
+    if not isinstance(source, str):
+        source = _as_picklable(source)
+
+    with _open(source) as doc:
+        page_count = len(doc)
+        if max_pages and page_count > max_pages:
+            log.info(f"PDF has {page_count} pages; extracting only the first {max_pages}.")
+            page_count = max_pages
+        parallel = settings.PARSER_WORKERS > 1 and page_count >= settings.PARSER_PARALLEL_MIN_PAGES
+        if not parallel:
+            pages = []
+            remaining = max_bytes
+            for i in range(page_count):
+                text = doc[i].get_text()
+                pages.append(text)
+                if max_bytes:
+                    remaining -= len(text.encode("utf-8"))
+                    if remaining <= 0:
+                        break
+            return _truncate(pages, max_bytes)
+
+    chunk = -(-page_count // settings.PARSER_WORKERS)
+    futures = [
+        _get_pool().submit(_extract_range, source, start, min(start + chunk, page_count))
+        for start in range(0, page_count, chunk)
+    ]
+    pages = []
+    for future in futures:
+        pages.extend(future.result())
+    return _truncate(pages, max_bytes)
+
+def parse_blocks(source: PdfSource, max_pages: Optional[int] = None) -> List[List[str]]:
+    """
+    Returns the text blocks of each page in reading order, so callers can
+    recognise and drop repeated headers and footers.
+    """
+    max_pages = settings.PARSER_MAX_PAGES if max_pages is None else max_pages
+    pages = []
+    with _open(source) as doc:
+        for i, page in enumerate(doc):
+            if max_pages and i >= max_pages:
+                break
+            # Block tuples are (x0, y0, x1, y1, text, block_no, block_type); type 1 is an image
+            pages.append([block[4] for block in page.get_text("blocks", sort=True) if block[6] == 0])
+    return pages
+
+def parse_text(
+    source: PdfSource,
+    max_pages: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> str:
+    return "".join(parse_pages(source, max_pages=max_pages, max_bytes=max_bytes))
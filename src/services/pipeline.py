@@ -0,0 +1,146 @@
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+# Marks the end of the input for a stage's workers.
+_SENTINEL = object()
+
+
+class Stage:
+    """A named pipeline step with its own pool of worker threads."""
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1, queue_size: int = 8):
+        if workers < 1:
+            raise ValueError(f"Stage '{name}' needs at least one worker.")
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue_size = max(1, queue_size)
+
+
+class Pipeline:
+    """
+    Runs items through a sequence of stages, each with its own worker pool and
+    a bounded input queue, so different items can be in different stages at
+    the same time.
+
+    Each stage receives the value returned by the previous one (the first stage
+    receives the item itself). A stage returning None ends processing for that
+    item: later stages are skipped and None is reported as its result. An
+    exception in a stage is captured for that item only and the remaining
+    stages are skipped for it; other items keep flowing.
+
+    Results are yielded in input order as (item, result, error) tuples. At most
+    `max_in_flight` items are held between reading the input and yielding the
+    result, which bounds memory use even for very long inputs.
+    """
+    def __init__(self, stages: List[Stage], max_in_flight: int = 32):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage.")
+        self.stages = stages
+        self.max_in_flight = max(1, max_in_flight)
+        # Input queues of the runs in progress, for queue_depths()
+        self._running: List[List[queue.Queue]] = []
+        self._running_lock = threading.Lock()
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Items waiting for each stage, summed over the runs in progress."""
+        depths = {stage.name: 0 for stage in self.stages}
+        with self._running_lock:
+            running = list(self._running)
+        for queues in running:
+            for stage, inbox in zip(self.stages, queues):
+                depths[stage.name] += inbox.qsize()
+        return depths
+
+    def run(self, items: Iterable[Any]) -> Iterator[Tuple[Any, Any, Optional[Exception]]]:
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        results: "queue.Queue" = queue.Queue()
+        window = threading.Semaphore(self.max_in_flight)
+        cancelled = threading.Event()
+        feed_error: List[BaseException] = []
+        threads = []
+
+        def feed():
+            try:
+                for index, item in enumerate(items):
+                    while not window.acquire(timeout=0.5):
+                        if cancelled.is_set():
+                            return
+                    if cancelled.is_set():
+                        return
+                    queues[0].put((index, item, item, None))
+            except BaseException as e:
+                log.exception(f"Pipeline input failed: {e}")
+                feed_error.append(e)
+            finally:
+                for _ in range(self.stages[0].workers):
+                    queues[0].put(_SENTINEL)
+
+        def work(stage_index: int, remaining: List[int], lock: threading.Lock):
+            stage = self.stages[stage_index]
+            inbox = queues[stage_index]
+            is_last = stage_index == len(self.stages) - 1
+            while True:
+                entry = inbox.get()
+                if entry is _SENTINEL:
+                    break
+                index, item, value, error = entry
+                if error is None and value is not None and not cancelled.is_set():
+                    try:
+                        value = stage.func(value)
+                    except Exception as e:
+                        log.warning(f"Stage '{stage.name}' failed for item {index}: {e}")
+                        value, error = None, e
+                if is_last:
+                    results.put((index, item, value, error))
+                else:
+                    queues[stage_index + 1].put((index, item, value, error))
+            # The last worker of a stage to exit closes the next stage.
+            with lock:
+                remaining[0] -= 1
+                last_worker = remaining[0] == 0
+            if last_worker:
+                if is_last:
+                    results.put(_SENTINEL)
+                else:
+                    for _ in range(self.stages[stage_index + 1].workers):
+                        queues[stage_index + 1].put(_SENTINEL)
+
+        threads.append(threading.Thread(target=feed, name="pipeline-feed", daemon=True))
+        for stage_index, stage in enumerate(self.stages):
+            remaining, lock = [stage.workers], threading.Lock()
+            for n in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=work, args=(stage_index, remaining, lock),
+                    name=f"pipeline-{stage.name}-{n}", daemon=True,
+                ))
+        for t in threads:
+            t.start()
+        with self._running_lock:
+            self._running.append(queues)
+
+        # Reorder finished items so they come out in input order.
+        pending = {}
+        next_index = 0
+        try:
+            while True:
+                entry = results.get()
+                if entry is _SENTINEL:
+                    break
+                index, item, value, error = entry
+                pending[index] = (item, value, error)
+                while next_index in pending:
+                    yield pending.pop(next_index)
+                    next_index += 1
+                    window.release()
+            if feed_error:
+                raise feed_error[0]
+        finally:
+            # Stop feeding new items if the consumer gave up early; items
+            # already queued drain through the stages without being processed.
+            cancelled.set()
+            with self._running_lock:
+                self._running.remove(queues)
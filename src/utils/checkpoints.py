@@ -0,0 +1,79 @@
+from dataclasses import dataclass
+from typing import Dict, Iterator, Tuple
+
+from src.core.config import batch_dir
+from src.utils.sqlite import ThreadLocalConnections
+
+
+@dataclass
+class RowResult:
+    drive_url: str
+    error: str
+    shared: bool
+
+
+class RowCheckpoints:
+    """
+    Durable results of finished CSV rows, keyed by job ID and row index, so
+    an interrupted batch job resumes after its last finished row instead of
+    repeating download, LLM and compile work.
+    """
+    def __init__(self, path: str):
+        self._db = ThreadLocalConnections(path)
+        self._db.get().execute(
+            "CREATE TABLE IF NOT EXISTS csv_rows ("
+            " job_id TEXT NOT NULL,"
+            " row_index INTEGER NOT NULL,"
+            " drive_url TEXT NOT NULL,"
+            " error TEXT NOT NULL,"
+            " shared INTEGER NOT NULL,"
+            " PRIMARY KEY (job_id, row_index))"
+        )
+
+    def counts(self, job_id: str) -> Tuple[int, int]:
+        """Number of finished rows and how many of them failed."""
+        finished, failed = self._db.get().execute(
+            "SELECT COUNT(*), COALESCE(SUM(error != ''), 0) FROM csv_rows WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return finished, failed
+
+    def load_unshared(self, job_id: str) -> Dict[int, RowResult]:
+        """Uploaded rows whose CVs have not been made public yet (at most a batch or so)."""
+        rows = self._db.get().execute(
+            "SELECT row_index, drive_url, error, shared FROM csv_rows"
+            " WHERE job_id = ? AND drive_url != '' AND error = '' AND shared = 0",
+            (job_id,),
+        ).fetchall()
+        return {index: RowResult(url, error, bool(shared)) for index, url, error, shared in rows}
+
+    def iter_results(self, job_id: str) -> Iterator[Tuple[int, RowResult]]:
+        """
+        Yields (row index, result) in row order without loading them all. Reads
+        from a snapshot on a connection of its own, so rows saved meanwhile are
+        not picked up half-way through.
+        """
+        conn = self._db.connect()
+        try:
+            cursor = conn.execute(
+                "SELECT row_index, drive_url, error, shared FROM csv_rows WHERE job_id = ? ORDER BY row_index",
+                (job_id,),
+            )
+            for index, url, error, shared in cursor:
+                yield index, RowResult(url, error, bool(shared))
+        finally:
+            conn.close()
+
+    def save(self, job_id: str, index: int, result: RowResult):
+        self.save_many(job_id, {index: result})
+
+    def save_many(self, job_id: str, results: Dict[int, RowResult]):
+        with self._db.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO csv_rows (job_id, row_index, drive_url, error, shared) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, index, r.drive_url, r.error, int(r.shared)) for index, r in results.items()],
+            )
+
+    def delete(self, job_id: str):
+        self._db.get().execute("DELETE FROM csv_rows WHERE job_id = ?", (job_id,))
+
+checkpoints = RowCheckpoints(str(batch_dir() / "checkpoints.sqlite3"))
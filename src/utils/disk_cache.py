@@ -0,0 +1,121 @@
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """
+    Size-bounded file cache kept in one directory, one file per key.
+
+    A file's mtime records when it was written (used for the optional TTL) and
+    its atime when it was last read, so eviction drops the least recently used
+    entries first once the directory grows past `max_bytes`.
+    """
+    def __init__(self, directory: Path, max_bytes: int, ttl: Optional[float] = None, suffix: str = ""):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def get_path(self, key: str) -> Optional[Path]:
+        """Returns the cached file for `key`, or None on a miss or expired entry."""
+        path = self.path_for(key)
+        try:
+            st = path.stat()
+        except OSError:
+            self._count(hit=False)
+            return None
+        now = time.time()
+        if self.ttl is not None and now - st.st_mtime > self.ttl:
+            path.unlink(missing_ok=True)
+            self._count(hit=False)
+            return None
+        try:
+            os.utime(path, (now, st.st_mtime))
+        except OSError:
+            pass
+        self._count(hit=True)
+        return path
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except OSError:
+            # Evicted by another worker between the lookup and the read
+            return None
+
+    def put_file(self, key: str, source: Path) -> Path:
+        """Copies `source` into the cache under `key`."""
+        tmp = self.directory / f".tmp_{uuid.uuid4().hex}"
+        shutil.copyfile(source, tmp)
+        return self._commit(key, tmp)
+
+    def put_bytes(self, key: str, data: bytes) -> Path:
+        tmp = self.directory / f".tmp_{uuid.uuid4().hex}"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        return self._commit(key, tmp)
+
+    def delete(self, key: str):
+        self.path_for(key).unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _commit(self, key: str, tmp: Path) -> Path:
+        path = self.path_for(key)
+        # Rename is atomic, so readers never see a partially written entry
+        os.replace(tmp, path)
+        self._evict()
+        return path
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.is_file() or entry.name.startswith(".tmp_"):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_atime, st.st_size, entry.path))
+                total += st.st_size
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            log.info(f"Evicted cache entries in {self.directory}; now {total} bytes")
@@ -1,8 +0,0 @@
-class DB:
-    def __init__(self):
-        self.data = {}
-    def set(self, key, value):
-        self.data[key] = value
-    def get(self, key):
-        return self.data.get(key, None)
-db = DB()
\ No newline at end of file
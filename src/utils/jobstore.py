@@ -0,0 +1,213 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from src.core.config import PROJECT_ROOT, settings
+from src.utils.sqlite import ThreadLocalConnections
+
+# Jobs in these states expire JOB_TTL_SECONDS after their last update
+TERMINAL_STATUSES = frozenset({"Done", "failed"})
+
+
+class JobStore(ABC):
+    """
+    Status records of single-CV and CSV jobs, keyed by job ID. Each record
+    is a dict with at least a "status" key.
+
+    Status changes go through transition(), which only applies when the job
+    is in one of the expected states, so two writers cannot both move a job
+    out of the same state. Finished jobs expire after `ttl` seconds.
+    """
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+
+    def _expires_at(self, status: str, now: float) -> Optional[float]:
+        if self.ttl and status in TERMINAL_STATUSES:
+            return now + self.ttl
+        return None
+
+    @abstractmethod
+    def create(self, job_id: str, status: str = "pending", **fields):
+        """Creates the job, replacing any existing record with the same ID."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[dict]:
+        """Returns the job record, or None if it does not exist or has expired."""
+
+    @abstractmethod
+    def update(self, job_id: str, **fields) -> bool:
+        """Merges `fields` into the record without changing its status; False if the job does not exist."""
+
+    @abstractmethod
+    def transition(self, job_id: str, status: str, expected: Optional[Iterable[str]] = None, **fields) -> bool:
+        """
+        Moves the job to `status` and merges `fields`, atomically. With
+        `expected`, only applies if the current status is one of them;
+        otherwise any unfinished job may move. Returns whether it applied.
+        """
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """Deletes expired jobs and returns how many were removed."""
+
+    def _allowed(self, current: str, expected: Optional[Iterable[str]]) -> bool:
+        if expected is None:
+            return current not in TERMINAL_STATUSES
+        return current in expected
+
+
+class MemoryJobStore(JobStore):
+    """Process-local store; fine for a single worker and for development."""
+    def __init__(self, ttl: float):
+        super().__init__(ttl)
+        self._jobs: Dict[str, Tuple[dict, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, job_id: str, now: float) -> Optional[dict]:
+        entry = self._jobs.get(job_id)
+        if entry is None:
+            return None
+        data, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            del self._jobs[job_id]
+            return None
+        return data
+
+    def create(self, job_id: str, status: str = "pending", **fields):
+        now = time.time()
+        with self._lock:
+            self._jobs[job_id] = ({**fields, "status": status}, self._expires_at(status, now))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            data = self._live(job_id, time.time())
+            return dict(data) if data is not None else None
+
+    def update(self, job_id: str, **fields) -> bool:
+        now = time.time()
+        with self._lock:
+            data = self._live(job_id, now)
+            if data is None:
+                return False
+            data.update(fields)
+            self._jobs[job_id] = (data, self._expires_at(data["status"], now))
+            return True
+
+    def transition(self, job_id: str, status: str, expected: Optional[Iterable[str]] = None, **fields) -> bool:
+        now = time.time()
+        with self._lock:
+            data = self._live(job_id, now)
+            if data is None or not self._allowed(data["status"], expected):
+                return False
+            data.update(fields)
+            data["status"] = status
+            self._jobs[job_id] = (data, self._expires_at(status, now))
+            return True
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, (_, expires_at) in self._jobs.items()
+                       if expires_at is not None and expires_at <= now]
+            for job_id in expired:
+                del self._jobs[job_id]
+            return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Store backed by a SQLite database in WAL mode, shared by all uvicorn
+    workers on the host and kept across restarts. Writes that read first run
+    in an IMMEDIATE transaction.
+    """
+    # Expired rows are only hidden by get(); delete them at most this often
+    PURGE_INTERVAL = 60.0
+
+    def __init__(self, path: str, ttl: float):
+        super().__init__(ttl)
+        self._db = ThreadLocalConnections(path)
+        self._last_purge = 0.0
+        self._db.get().execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " expires_at REAL)"
+        )
+        self._db.get().execute("CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at)")
+
+    def _maybe_purge(self, now: float):
+        if now - self._last_purge >= self.PURGE_INTERVAL:
+            self._last_purge = now
+            self.purge_expired()
+
+    def create(self, job_id: str, status: str = "pending", **fields):
+        now = time.time()
+        data = {**fields, "status": status}
+        self._db.get().execute(
+            "INSERT OR REPLACE INTO jobs (id, status, data, updated_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, status, json.dumps(data), now, self._expires_at(status, now)),
+        )
+        self._maybe_purge(now)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._db.get().execute(
+            "SELECT data FROM jobs WHERE id = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (job_id, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _modify(self, job_id: str, status: Optional[str], expected: Optional[Iterable[str]], fields: dict) -> bool:
+        now = time.time()
+        with self._db.transaction() as conn:
+            row = conn.execute(
+                "SELECT data FROM jobs WHERE id = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (job_id, now),
+            ).fetchone()
+            if row is None:
+                return False
+            data = json.loads(row[0])
+            if status is not None and not self._allowed(data["status"], expected):
+                return False
+            data.update(fields)
+            if status is not None:
+                data["status"] = status
+            conn.execute(
+                "UPDATE jobs SET status = ?, data = ?, updated_at = ?, expires_at = ? WHERE id = ?",
+                (data["status"], json.dumps(data), now, self._expires_at(data["status"], now), job_id),
+            )
+            return True
+
+    def update(self, job_id: str, **fields) -> bool:
+        return self._modify(job_id, None, None, fields)
+
+    def transition(self, job_id: str, status: str, expected: Optional[Iterable[str]] = None, **fields) -> bool:
+        applied = self._modify(job_id, status, tuple(expected) if expected is not None else None, fields)
+        if applied and status in TERMINAL_STATUSES:
+            self._maybe_purge(time.time())
+        return applied
+
+    def purge_expired(self) -> int:
+        cursor = self._db.get().execute(
+            "DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+        )
+        return cursor.rowcount
+
+
+def create_job_store() -> JobStore:
+    """Builds the store selected by JOB_STORE_BACKEND ("sqlite" or "memory")."""
+    backend = settings.JOB_STORE_BACKEND.lower()
+    if backend == "memory":
+        return MemoryJobStore(ttl=settings.JOB_TTL_SECONDS)
+    if backend == "sqlite":
+        path = Path(settings.JOB_STORE_PATH)
+        if not path.is_absolute():
+            path = PROJECT_ROOT / path
+        return SQLiteJobStore(str(path), ttl=settings.JOB_TTL_SECONDS)
+    raise ValueError(f"Unknown JOB_STORE_BACKEND: {settings.JOB_STORE_BACKEND}")
+
+jobs = create_job_store()
@@ -0,0 +1,147 @@
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import List, Optional
+
+from src.core.config import cache_dir, settings
+from src.utils.disk_cache import DiskCache
+from src.utils.metrics import registry
+
+log = logging.getLogger(__name__)
+
+# Profile IDs double as file names, so only these characters are accepted
+PROFILE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+_profiles_saved = registry.counter(
+    "cvforge_profiles_saved_total", "cProfile captures stored for download.")
+_profiles_skipped = registry.counter(
+    "cvforge_profiles_skipped_total", "Captures not started because PROFILE_MAX_CONCURRENT were running.")
+
+_store: Optional[DiskCache] = None
+_store_lock = threading.Lock()
+_slots: Optional[threading.BoundedSemaphore] = None
+
+def _get_store() -> DiskCache:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DiskCache(cache_dir("profiles"), max_bytes=settings.PROFILE_MAX_BYTES, suffix=".prof")
+    return _store
+
+def _get_slots() -> threading.BoundedSemaphore:
+    global _slots
+    if _slots is None:
+        with _store_lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(max(1, settings.PROFILE_MAX_CONCURRENT))
+    return _slots
+
+
+class ProfileSession:
+    """
+    One cProfile capture of a CV job or batch row. The work may run on
+    several threads one after the other (as pipeline stages do); each
+    record() block profiles its own thread and save() merges them.
+    """
+    def __init__(self, profile_id: str):
+        self.profile_id = profile_id
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._saved = False
+
+    @contextmanager
+    def record(self):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiler (or debugger) is active; run unprofiled
+            log.debug(f"Could not start profiler for {self.profile_id}: {e}")
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._profiles.append(profile)
+
+    def save(self) -> Optional[str]:
+        """Stores the merged capture and frees its slot; returns the profile ID, or None if nothing was recorded."""
+        with self._lock:
+            if self._saved:
+                return None
+            self._saved = True
+            profiles, self._profiles = self._profiles, []
+        try:
+            if not profiles:
+                return None
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            # Same format as Stats.dump_stats, so pstats and snakeviz can open the file
+            _get_store().put_bytes(self.profile_id, marshal.dumps(stats.stats))
+            _profiles_saved.inc()
+            log.info(f"Saved profile {self.profile_id}")
+            return self.profile_id
+        except Exception as e:
+            log.warning(f"Could not save profile {self.profile_id}: {e}")
+            return None
+        finally:
+            _get_slots().release()
+
+
+def start(name: str, requested: bool = False) -> Optional[ProfileSession]:
+    """
+    Starts a capture for the job or row called `name` if it was requested or
+    is picked by PROFILE_SAMPLE_RATE. Returns None when it is not profiled,
+    including when PROFILE_MAX_CONCURRENT captures are already running.
+    """
+    if not requested and not (settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE):
+        return None
+    if not _get_slots().acquire(blocking=False):
+        _profiles_skipped.inc()
+        return None
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    return ProfileSession(f"{stamp}-{name}-{uuid.uuid4().hex[:6]}")
+
+def recording(session: Optional[ProfileSession]):
+    """Context manager profiling the enclosed block into `session`; does nothing without one."""
+    return session.record() if session is not None else nullcontext()
+
+def list_profiles() -> List[dict]:
+    """Stored captures, newest first."""
+    profiles = []
+    for path in _get_store().directory.glob("*.prof"):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        profiles.append({"id": path.stem, "bytes": st.st_size, "created": st.st_mtime})
+    profiles.sort(key=lambda p: p["created"], reverse=True)
+    return profiles
+
+def profile_path(profile_id: str) -> Optional[Path]:
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    path = _get_store().path_for(profile_id)
+    return path if path.is_file() else None
+
+def summary(profile_id: str, limit: int = 40) -> Optional[str]:
+    """The capture's top functions by cumulative time, as pstats prints them."""
+    path = profile_path(profile_id)
+    if path is None:
+        return None
+    out = io.StringIO()
+    pstats.Stats(str(path), stream=out).strip_dirs().sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
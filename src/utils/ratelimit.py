@@ -0,0 +1,37 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `rate` tokens per second, holding at
+    most `capacity` tokens.
+
+    Callers reserve tokens up front, which may drive the balance negative, and
+    then wait until the bucket would have refilled. Concurrent callers are
+    therefore spaced out evenly instead of all retrying at the same moment.
+    """
+    def __init__(self, capacity: float, rate: float):
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        self.capacity = max(1.0, capacity)
+        self.rate = rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount: float) -> float:
+        """Takes `amount` tokens and returns how long the caller must wait for them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, amount: float = 1) -> float:
+        """Blocks until `amount` tokens are available; returns the time waited."""
+        wait = self._reserve(amount)
+        if wait:
+            time.sleep(wait)
+        return wait
@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Settings are read when src.core.config is imported; keep the job store,
+# batch checkpoints and caches of the test run out of the project directory.
+_data_dir = tempfile.mkdtemp(prefix="cvforge-tests-")
+os.environ.setdefault("JOB_STORE_PATH", os.path.join(_data_dir, "jobs.sqlite3"))
+os.environ.setdefault("BATCH_DIR", os.path.join(_data_dir, "batches"))
+os.environ.setdefault("CACHE_DIR", os.path.join(_data_dir, "cache"))
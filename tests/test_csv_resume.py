@@ -0,0 +1,170 @@
+import csv
+import threading
+import uuid
+from collections import Counter
+
+import pytest
+
+from src.routers import cv
+from src.utils.checkpoints import RowCheckpoints
+from src.utils.jobstore import MemoryJobStore
+
+ROWS = 12
+BAD_ROW = 4  # extraction fails for this row on every run
+
+
+class Crash(Exception):
+    """Raised by a stub to stop a job part-way through."""
+
+
+class FakeServices:
+    """Stands in for Drive, the parser, the LLM and the compiler, counting the rows each one sees."""
+    def __init__(self, monkeypatch, tmp_path):
+        self.tmp_path = tmp_path
+        self.downloads = Counter()
+        self.shares = Counter()
+        self.crash_on_row = None
+        self.result_csv = None
+        self._lock = threading.Lock()
+        for module, name, stub in (
+            (cv.drive, "get_files_metadata", self.get_files_metadata),
+            (cv.drive, "download_from_drive", self.download_from_drive),
+            (cv.drive, "upload_to_drive", self.upload_to_drive),
+            (cv.drive, "share_publicly", self.share_publicly),
+            (cv.parser, "parse_pages", lambda source: [source.decode()]),
+            (cv.normalizer, "normalize_pages", lambda pages, cv_id=None: "\n".join(pages)),
+            (cv.llm, "extract_structured_data", self.extract_structured_data),
+            (cv.compiler, "compile_latex_string_to_pdf", self.compile_latex_string_to_pdf),
+        ):
+            monkeypatch.setattr(module, name, stub)
+
+    def get_files_metadata(self, file_ids):
+        return {file_id: {"id": file_id, "mimeType": "application/pdf"} for file_id in file_ids}
+
+    def download_from_drive(self, cv_id, drive_url, dest_path=None, meta=None):
+        file_id = cv.drive.extract_file_id(drive_url)
+        with self._lock:
+            self.downloads[file_id] += 1
+        return file_id.encode()
+
+    def extract_structured_data(self, raw_text):
+        if raw_text == f"cv{BAD_ROW}":
+            raise ValueError("unreadable CV")
+        return raw_text
+
+    def compile_latex_string_to_pdf(self, structured):
+        path = self.tmp_path / f"{uuid.uuid4()}.pdf"
+        path.write_text(f"new-{structured}")
+        return str(path)
+
+    def upload_to_drive(self, cv_id, file_path, drive_name=None, mime_type=None, share=True):
+        with open(file_path) as f:
+            content = f.read()
+        if drive_name == "processed_csv.csv":
+            self.result_csv = list(csv.DictReader(content.splitlines()))
+            return "https://drive.google.com/file/d/result/view"
+        return f"https://drive.google.com/file/d/{content}/view"
+
+    def share_publicly(self, file_ids):
+        self.shares.update(list(file_ids))
+        return {file_id: None for file_id in file_ids}
+
+
+@pytest.fixture
+def services(monkeypatch, tmp_path):
+    monkeypatch.setattr(cv, "jobs", MemoryJobStore(ttl=60))
+    monkeypatch.setattr(cv, "checkpoints", RowCheckpoints(str(tmp_path / "checkpoints.sqlite3")))
+    monkeypatch.setattr(cv.settings, "BATCH_DIR", str(tmp_path / "batches"))
+    # Small batches and windows, so rows are shared and written in several rounds
+    monkeypatch.setattr(cv.settings, "DRIVE_BATCH_SIZE", 3)
+    monkeypatch.setattr(cv.settings, "CSV_MAX_IN_FLIGHT", 4)
+    fakes = FakeServices(monkeypatch, tmp_path)
+
+    real_save = cv.checkpoints.save
+
+    def save(job_id, index, result):
+        if index == fakes.crash_on_row:
+            raise Crash(f"crashed at row {index}")
+        real_save(job_id, index, result)
+    monkeypatch.setattr(cv.checkpoints, "save", save)
+    return fakes
+
+
+def _new_batch(rows: int = ROWS) -> str:
+    job_id = str(uuid.uuid4())
+    workdir = cv.batch_dir(job_id)
+    workdir.mkdir(parents=True)
+    with open(workdir / "input.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["name", "cv_link"])
+        writer.writeheader()
+        for index in range(rows):
+            writer.writerow({"name": f"person {index}", "cv_link": f"https://drive.google.com/file/d/cv{index}/view"})
+    cv.jobs.create(job_id, status="pending")
+    return job_id
+
+
+def _assert_finished(services, job_id):
+    job = cv.jobs.get(job_id)
+    assert job["status"] == "Done"
+    assert job.get("error") is None
+    assert (job["processed"], job["failed"]) == (ROWS, 1)
+    assert [row["name"] for row in services.result_csv] == [f"person {i}" for i in range(ROWS)]
+    for index, row in enumerate(services.result_csv):
+        if index == BAD_ROW:
+            assert (row["drive_url"], row["error"]) == ("", "unreadable CV")
+        else:
+            assert (row["drive_url"], row["error"]) == (f"https://drive.google.com/file/d/new-cv{index}/view", "")
+    # The batch directory and the checkpoints are gone once the job is done
+    assert not cv.batch_dir(job_id).exists()
+    assert cv.checkpoints.counts(job_id) == (0, 0)
+
+
+def test_batch_runs_to_completion(services):
+    job_id = _new_batch()
+    cv._process_csv_job(job_id)
+    _assert_finished(services, job_id)
+    assert all(services.downloads[f"cv{i}"] == 1 for i in range(ROWS))
+
+
+def test_failed_batch_resumes_from_its_checkpoints(services):
+    job_id = _new_batch()
+    services.crash_on_row = 8
+    cv._process_csv_job(job_id)
+
+    job = cv.jobs.get(job_id)
+    assert job["status"] == "failed" and "crashed at row 8" in job["error"]
+    done = dict(cv.checkpoints.iter_results(job_id))
+    assert sorted(done) == list(range(8))
+    # Rows still waiting for their share batch are shared when the job resumes
+    unshared = sorted(cv.checkpoints.load_unshared(job_id))
+    assert unshared and set(unshared) < set(done)
+
+    services.crash_on_row = None
+    services.downloads.clear()
+    assert cv.jobs.transition(job_id, "pending", expected=("failed",))
+    cv._process_csv_job(job_id)
+
+    _assert_finished(services, job_id)
+    # Only the rows without a checkpoint were processed again
+    assert set(services.downloads) == {f"cv{i}" for i in range(8, ROWS)}
+    # Every uploaded CV was made public exactly once over both runs
+    assert services.shares == Counter(f"new-cv{i}" for i in range(ROWS) if i != BAD_ROW)
+
+
+def test_interrupted_batch_is_resumed_at_startup(services):
+    job_id = _new_batch()
+    services.crash_on_row = 5
+    # A process that dies mid-job leaves the job "processing" and its lock free
+    with pytest.raises(Crash):
+        cv._run_csv_job(job_id)
+    assert cv.jobs.get(job_id)["status"] == "processing"
+
+    services.crash_on_row = None
+    services.downloads.clear()
+    cv.resume_interrupted_batches()
+    for thread in threading.enumerate():
+        if thread.name == f"csv-resume-{job_id[:8]}":
+            thread.join(timeout=10)
+
+    _assert_finished(services, job_id)
+    assert set(services.downloads) == {f"cv{i}" for i in range(5, ROWS)}
@@ -0,0 +1,164 @@
+"""
+Resumable Drive uploads against a local fake Drive server, reached through
+DRIVE_API_ENDPOINT. The server implements just enough of the resumable
+protocol: POST opens a session, PUT appends a chunk and answers 308 with the
+acknowledged Range until the last byte arrives.
+"""
+import json
+import os
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from googleapiclient.errors import HttpError
+
+from src.core.config import settings
+from src.services import drive
+
+CHUNK = 256 * 1024
+
+
+class FakeDrive(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.sessions = {}
+        self.files = {}
+        self.posts = 0
+        self.puts = 0
+        self.bytes_received = 0
+        # Status to answer the n-th chunk PUT (counting from 1) with, instead of accepting it
+        self.fail_puts = {}
+        # Status to answer session-opening POSTs with, if any
+        self.post_status = None
+        self.lock = threading.Lock()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code, body=b"", headers=()):
+        self.send_response(code)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        server = self.server
+        if not self.path.startswith("/upload/drive/v3/files"):
+            return self._send(404)
+        with server.lock:
+            server.posts += 1
+            if server.post_status:
+                return self._send(server.post_status, b"{}", [("Content-Type", "application/json")])
+            session = uuid.uuid4().hex
+            server.sessions[session] = bytearray()
+        return self._send(200, headers=[("Location", f"http://127.0.0.1:{server.server_port}/session/{session}")])
+
+    def do_PUT(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        session = self.path.rsplit("/", 1)[1]
+        content_range = self.headers.get("Content-Range", "")
+        with server.lock:
+            buf = server.sessions.get(session)
+            if buf is None:
+                return self._send(404, b"{}")
+            if body:
+                server.puts += 1
+                status = server.fail_puts.pop(server.puts, None)
+                if status == 404:
+                    # The session expired
+                    del server.sessions[session]
+                if status:
+                    return self._send(status, b"{}", [("Content-Type", "application/json")])
+            match = re.match(r"bytes (\d+)-(\d+)/(\d+|\*)", content_range)
+            if match:
+                assert int(match[1]) == len(buf), "chunk does not continue the acknowledged range"
+                buf.extend(body)
+                server.bytes_received += len(body)
+                total = match[3]
+            else:
+                # Status query after an error: "bytes */<size>"
+                total = content_range.rsplit("/", 1)[-1]
+            if total != "*" and len(buf) == int(total):
+                file_id = uuid.uuid4().hex[:10]
+                server.files[file_id] = bytes(buf)
+                return self._send(200, json.dumps({"id": file_id}).encode(), [("Content-Type", "application/json")])
+            headers = [("Range", f"bytes=0-{len(buf) - 1}")] if buf else []
+            return self._send(308, headers=headers)
+
+
+@pytest.fixture
+def fake_drive(monkeypatch):
+    server = FakeDrive()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(settings, "DRIVE_API_ENDPOINT", f"http://127.0.0.1:{server.server_port}/")
+    monkeypatch.setattr(settings, "DRIVE_UPLOAD_CHUNK_BYTES", CHUNK)
+    monkeypatch.setattr(settings, "DRIVE_UPLOAD_RETRY_BASE_SECONDS", 0)
+    # Clients are cached per thread; make this test build one for the fake server
+    monkeypatch.setattr(drive, "_thread_local", threading.local())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def upload_file(tmp_path):
+    data = os.urandom(3 * CHUNK + 123)
+    path = tmp_path / "cv.pdf"
+    path.write_bytes(data)
+    return str(path), data
+
+
+def _upload(path):
+    return drive._upload_resumable(drive._get_drive_service(), path, {"name": "cv.pdf"}, "application/pdf")
+
+
+def test_upload_in_chunks(fake_drive, upload_file):
+    path, data = upload_file
+    response = _upload(path)
+    assert fake_drive.files[response["id"]] == data
+    assert fake_drive.posts == 1
+    assert fake_drive.puts == 4
+
+
+def test_resumes_after_server_error(fake_drive, upload_file):
+    path, data = upload_file
+    fake_drive.fail_puts = {2: 503}
+    response = _upload(path)
+    assert fake_drive.files[response["id"]] == data
+    # Same session, and no acknowledged byte was sent twice
+    assert fake_drive.posts == 1
+    assert fake_drive.bytes_received == len(data)
+
+
+def test_restarts_expired_session(fake_drive, upload_file):
+    path, data = upload_file
+    fake_drive.fail_puts = {3: 404}
+    response = _upload(path)
+    assert fake_drive.files[response["id"]] == data
+    assert fake_drive.posts == 2
+
+
+def test_not_found_before_session_is_not_a_restart(fake_drive, upload_file):
+    path, _ = upload_file
+    fake_drive.post_status = 404
+    with pytest.raises(HttpError) as raised:
+        _upload(path)
+    assert raised.value.resp.status == 404
+    assert fake_drive.posts == 1
+
+
+def test_local_file_errors_are_not_retried(fake_drive, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        _upload(str(tmp_path / "missing.pdf"))
+    assert fake_drive.posts == 0
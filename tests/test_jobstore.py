@@ -0,0 +1,131 @@
+import types
+
+import pytest
+
+from src.utils import jobstore
+from src.utils.jobstore import MemoryJobStore, SQLiteJobStore
+
+# Shorter than SQLiteJobStore.PURGE_INTERVAL, so purges only happen when asked for
+TTL = 30
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(jobstore, "time", types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path, clock):
+    if request.param == "memory":
+        return MemoryJobStore(ttl=TTL)
+    return SQLiteJobStore(str(tmp_path / "jobs.sqlite3"), ttl=TTL)
+
+
+def test_create_replaces_and_get_copies(store):
+    store.create("job", status="pending", filename="a.pdf")
+    store.create("job", status="processing")
+    job = store.get("job")
+    assert job == {"status": "processing"}
+    job["status"] = "Done"
+    assert store.get("job")["status"] == "processing"
+    assert store.get("missing") is None
+
+
+def test_transition_requires_expected_status(store):
+    store.create("job")
+    assert not store.transition("job", "Done", expected=("processing",))
+    assert store.get("job")["status"] == "pending"
+    assert store.transition("job", "processing", expected=("pending",), processed=0)
+    assert store.transition("job", "Done", expected=("processing",), processed=3)
+    assert store.get("job") == {"status": "Done", "processed": 3}
+
+
+def test_only_one_writer_claims_a_state(store):
+    store.create("job")
+    assert store.transition("job", "processing", expected=("pending",))
+    assert not store.transition("job", "processing", expected=("pending",))
+
+
+def test_finished_jobs_only_move_when_expected(store):
+    store.create("job")
+    assert store.transition("job", "failed", error="boom")
+    assert not store.transition("job", "processing")
+    assert not store.transition("job", "Done")
+    assert store.get("job") == {"status": "failed", "error": "boom"}
+    # Resuming names the terminal state explicitly
+    assert store.transition("job", "pending", expected=("failed",))
+    assert store.get("job")["status"] == "pending"
+
+
+def test_update_keeps_status(store):
+    store.create("job", status="processing")
+    assert store.update("job", processed=2, status_detail="row 2")
+    assert store.get("job") == {"status": "processing", "processed": 2, "status_detail": "row 2"}
+    assert not store.update("missing", processed=1)
+    assert not store.transition("missing", "Done")
+
+
+def test_finished_jobs_expire_after_ttl(store, clock):
+    store.create("running", status="processing")
+    store.create("done")
+    store.transition("done", "Done")
+    clock.now += TTL - 1
+    assert store.get("done")["status"] == "Done"
+    clock.now += 1
+    assert store.get("done") is None
+    assert not store.update("done", processed=1)
+    # Unfinished jobs never expire
+    assert store.get("running")["status"] == "processing"
+
+
+def test_update_of_finished_job_extends_its_ttl(store, clock):
+    store.create("job", status="Done")
+    clock.now += TTL - 1
+    assert store.update("job", csv_drive_url="url")
+    clock.now += TTL - 1
+    assert store.get("job")["csv_drive_url"] == "url"
+
+
+def test_resumed_job_no_longer_expires(store, clock):
+    store.create("job", status="failed")
+    assert store.transition("job", "pending", expected=("failed",))
+    clock.now += TTL * 10
+    assert store.get("job")["status"] == "pending"
+
+
+def test_purge_expired(store, clock):
+    store.create("old", status="Done")
+    store.create("failed", status="failed")
+    clock.now += TTL
+    store.create("new", status="Done")
+    store.create("running", status="processing")
+    assert store.purge_expired() == 2
+    assert store.purge_expired() == 0
+    assert store.get("new") is not None and store.get("running") is not None
+
+
+def test_zero_ttl_keeps_finished_jobs(tmp_path, clock):
+    for store in (MemoryJobStore(ttl=0), SQLiteJobStore(str(tmp_path / "jobs.sqlite3"), ttl=0)):
+        store.create("job", status="Done")
+        clock.now += 10 ** 9
+        assert store.get("job") == {"status": "Done"}
+        assert store.purge_expired() == 0
+
+
+def test_sqlite_store_is_shared_and_persistent(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    first, second = SQLiteJobStore(path, ttl=TTL), SQLiteJobStore(path, ttl=TTL)
+    first.create("job")
+    assert second.transition("job", "processing", expected=("pending",))
+    assert not first.transition("job", "processing", expected=("pending",))
+    assert SQLiteJobStore(path, ttl=TTL).get("job") == {"status": "processing"}
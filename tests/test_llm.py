@@ -0,0 +1,28 @@
+import pytest
+
+from src.services import llm
+
+
+class StubChain:
+    def __init__(self, reply):
+        self.reply = reply
+
+    def invoke(self, input):
+        return self.reply
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setattr(llm.settings, "LLM_CACHE_ENABLED", False)
+
+
+def test_empty_reply_is_an_extraction_error(monkeypatch):
+    monkeypatch.setattr(llm, "_chain", StubChain(None))
+    with pytest.raises(llm.LLMExtractionError):
+        llm.extract_structured_data("Jane Doe, engineer")
+
+
+def test_reply_is_returned(monkeypatch):
+    reply = object()
+    monkeypatch.setattr(llm, "_chain", StubChain(reply))
+    assert llm.extract_structured_data("Jane Doe, engineer") is reply
@@ -0,0 +1,47 @@
+"""
+Benchmarks building the Gemini chain per call (as extraction did before it
+was cached) against reusing the process-wide chain. Neither makes a network
+call; a dummy API key is enough to construct the client.
+
+    python -m pytest tests/test_llm_bench.py --benchmark-only
+"""
+import time
+
+import pytest
+
+from src.services import llm
+
+
+@pytest.fixture
+def fresh_chain(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "dummy-key-for-benchmarks")
+    monkeypatch.setattr(llm, "_chain", None)
+
+
+def _build_per_call():
+    llm._chain = None
+    return llm._get_chain()
+
+
+def test_chain_is_built_once(fresh_chain):
+    assert llm._get_chain() is llm._get_chain()
+
+
+def test_reuse_is_cheaper_than_building(fresh_chain):
+    started = time.perf_counter()
+    _build_per_call()
+    build_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(1000):
+        llm._get_chain()
+    reuse_seconds = (time.perf_counter() - started) / 1000
+    assert reuse_seconds * 100 < build_seconds
+
+
+def test_bench_chain_built_per_call(benchmark, fresh_chain):
+    benchmark(_build_per_call)
+
+
+def test_bench_chain_reused(benchmark, fresh_chain):
+    llm._get_chain()
+    benchmark(llm._get_chain)
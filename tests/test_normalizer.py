@@ -0,0 +1,50 @@
+from src.services.normalizer import normalize_pages
+
+
+def _page(*lines: str) -> str:
+    return "\n".join(lines) + "\n"
+
+
+def test_two_page_cv_keeps_repeated_roles_and_numbers():
+    pages = [
+        _page("Jane Doe", "Acme", "Software Engineer", "Addis Ababa, Ethiopia", "Years of experience:", "5",
+              "Built things", "Shipped things", "1"),
+        _page("Globex", "Software Engineer", "Addis Ababa, Ethiopia", "Ran things", "Fixed things", "2 of 2"),
+    ]
+    lines = normalize_pages(pages).splitlines()
+    assert lines.count("Software Engineer") == 2
+    assert lines.count("Addis Ababa, Ethiopia") == 2
+    assert "5" in lines
+    assert "1" not in lines and "2 of 2" not in lines
+
+
+def test_line_near_the_top_of_only_some_pages_is_kept():
+    pages = [
+        _page("Engineer at X", "Jane Doe", "Summary", "body 1", "more 1", "end 1"),
+        _page("Engineer at X", "Led the platform team", "body 2", "more 2", "end 2"),
+        _page("Education", "University of Y", "body 3", "more 3", "end 3"),
+    ]
+    assert normalize_pages(pages).splitlines().count("Engineer at X") == 2
+
+
+def test_line_at_different_offsets_is_kept():
+    pages = [
+        _page("Jane Doe", "Engineer at X", "body 1", "more 1", "end 1"),
+        _page("Engineer at X", "body 2", "more 2", "end 2", "tail 2"),
+        _page("Intro", "Summary", "Engineer at X", "body 3", "end 3"),
+    ]
+    assert normalize_pages(pages).splitlines().count("Engineer at X") == 3
+
+
+def test_running_header_and_footer_are_kept_once():
+    pages = [
+        _page("Jane Doe - Curriculum Vitae", f"content {i}", str(i + 4), f"more {i}", f"end {i}",
+              "jane@example.com", f"Page {i} of 3")
+        for i in (1, 2, 3)
+    ]
+    lines = normalize_pages(pages).splitlines()
+    assert lines.count("Jane Doe - Curriculum Vitae") == 1
+    assert lines.count("jane@example.com") == 1
+    assert {"5", "6", "7"} <= set(lines)
+    assert not any(line.startswith("Page ") for line in lines)
+    assert [line for line in lines if line.startswith("content")] == ["content 1", "content 2", "content 3"]
@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+
+from src.services.pipeline import Pipeline, Stage
+
+
+def _slow_by_item(item):
+    # Later items finish first, so results only come back in order if reordered
+    time.sleep(0.001 * (20 - item % 20))
+    return item
+
+
+def test_results_come_back_in_input_order():
+    pipeline = Pipeline([
+        Stage("first", _slow_by_item, workers=4),
+        Stage("second", lambda value: value * 10, workers=3),
+    ], max_in_flight=8)
+    results = list(pipeline.run(range(100)))
+    assert [item for item, _, _ in results] == list(range(100))
+    assert [result for _, result, _ in results] == [item * 10 for item in range(100)]
+    assert all(error is None for _, _, error in results)
+
+
+def test_failures_are_isolated_per_item():
+    calls = []
+
+    def fail_on_three(value):
+        if value == 3:
+            raise ValueError("bad row")
+        return value
+
+    def record(value):
+        calls.append(value)
+        return value
+
+    pipeline = Pipeline([Stage("check", fail_on_three, workers=2), Stage("record", record, workers=2)])
+    results = {item: (result, error) for item, result, error in pipeline.run(range(6))}
+    result, error = results[3]
+    assert result is None and isinstance(error, ValueError)
+    assert all(results[item] == (item, None) for item in (0, 1, 2, 4, 5))
+    # Later stages are skipped for the failed item only
+    assert sorted(calls) == [0, 1, 2, 4, 5]
+
+
+def test_none_skips_later_stages():
+    later = []
+    pipeline = Pipeline([
+        Stage("filter", lambda value: None if value % 2 else value),
+        Stage("later", lambda value: later.append(value) or value),
+    ])
+    results = list(pipeline.run(range(6)))
+    assert [result for _, result, _ in results] == [0, None, 2, None, 4, None]
+    assert sorted(later) == [0, 2, 4]
+
+
+def test_input_errors_are_raised_to_the_consumer():
+    def items():
+        yield 1
+        raise OSError("unreadable input")
+
+    pipeline = Pipeline([Stage("echo", lambda value: value)])
+    with pytest.raises(OSError):
+        list(pipeline.run(items()))
+
+
+def test_consumer_stopping_early_stops_the_feed():
+    read = []
+
+    def endless():
+        n = 0
+        while True:
+            read.append(n)
+            yield n
+            n += 1
+
+    pipeline = Pipeline([Stage("echo", lambda value: value, workers=2, queue_size=2)], max_in_flight=4)
+    results = pipeline.run(endless())
+    assert [next(results)[0] for _ in range(3)] == [0, 1, 2]
+    results.close()
+    time.sleep(0.7)  # longer than the feeder's wait for a free slot
+    consumed = len(read)
+    time.sleep(0.3)
+    assert len(read) == consumed
+    # Only the window of in-flight items was read beyond what was consumed
+    assert consumed <= 3 + 4 + 1
+    assert pipeline.queue_depths() == {"echo": 0}
+    assert not any(t.name.startswith("pipeline-feed") for t in threading.enumerate())
@@ -0,0 +1,171 @@
+"""
+Regression and speed checks for the templater. The reference helpers below
+are the implementations escape_latex and format_date_month_year replaced;
+rendered output must stay byte-identical to what they produced.
+
+    python -m pytest tests/test_templater_bench.py --benchmark-only
+"""
+import random
+import re
+from datetime import datetime
+
+import pytest
+
+from src.models.dtos import CVSchema
+from src.services import templater
+
+LAST_UPDATED = datetime(2024, 9, 1)
+
+_SPECIALS = "&%$#_{}~^\\\n"
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz ABCXYZ0123456789.,;:-/()'\"é–ñ中\t" + _SPECIALS
+_DATES = [
+    "2020-01", "2020-1", "2020-12", "2020-13", "2020-00", "1999", "0000", "0000-05",
+    "Present", "present", "PRESENT", "2021-7-1", " 2020-01", "2020-01 ", "Jan 2020",
+    "２０２０", "2020-０１", "20201", "Summer 2019", "", None,
+]
+
+
+def reference_escape_latex(text: str) -> str:
+    if not isinstance(text, str):
+        text = str(text)
+    chars = {
+        '&': r'\&',
+        '%': r'\%',
+        '$': r'\$',
+        '#': r'\#',
+        '_': r'\_',
+        '{': r'\{',
+        '}': r'\}',
+        '~': r'\textasciitilde{}',
+        '^': r'\^{}',
+        '\\': r'\textbackslash{}',
+        '\n': r' ',
+    }
+    regex = re.compile('|'.join(re.escape(key) for key in chars.keys()))
+    return regex.sub(lambda match: chars[match.group(0)], text)
+
+
+def reference_format_date_month_year(date_str):
+    if not date_str:
+        return None
+    if date_str.lower() == 'present':
+        return 'Present'
+    try:
+        return datetime.strptime(date_str, '%Y-%m').strftime('%b %Y')
+    except ValueError:
+        try:
+            return datetime.strptime(date_str, '%Y').strftime('%Y')
+        except ValueError:
+            return reference_escape_latex(date_str)
+
+
+def _text(rng: random.Random, max_len: int = 40) -> str:
+    return "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(1, max_len)))
+
+
+def _texts(rng: random.Random, count: int):
+    return [_text(rng) for _ in range(rng.randint(0, count))] or None
+
+
+def _date(rng: random.Random):
+    return rng.choice(_DATES) if rng.random() < 0.8 else f"{rng.randint(0, 9999):04d}-{rng.randint(0, 14)}"
+
+
+def synthetic_cv(rng: random.Random, entries: int) -> CVSchema:
+    """A CV with `entries` items per section, filled with special characters and odd dates."""
+    return CVSchema.model_validate({
+        "personal_info": {
+            "full_name": _text(rng),
+            "location": _text(rng),
+            "email": "jane.doe@example.com",
+            "phone": _text(rng, 15),
+            "website": rng.choice(["https://www.example.com/a_b/", "example.org", None]),
+            "linkedin": rng.choice(["https://linkedin.com/in/jane_doe/", None]),
+            "github": rng.choice(["https://github.com/jane%doe", None]),
+        },
+        "summary": {"text": _text(rng, 400)},
+        "education": [{
+            "institution": _text(rng), "degree": _text(rng), "field_of_study": _text(rng),
+            "start_date": _date(rng), "end_date": _date(rng), "location": _text(rng),
+            "gpa": _text(rng, 5), "coursework": _texts(rng, 8),
+        } for _ in range(entries)],
+        "experience": [{
+            "company": _text(rng), "role": _text(rng), "start_date": _date(rng),
+            "end_date": _date(rng), "location": _text(rng), "achievements": _texts(rng, 10),
+        } for _ in range(entries)],
+        "publications": [{
+            "title": _text(rng), "authors": _texts(rng, 6), "date": _date(rng),
+            "publisher": _text(rng), "doi": _text(rng, 20), "url": rng.choice(["https://doi.org/10.1/x_y", None]),
+        } for _ in range(entries)],
+        "projects": [{
+            "name": _text(rng), "description": _text(rng, 200), "url": rng.choice(["https://github.com/a/b", None]),
+            "start_date": _date(rng), "end_date": _date(rng), "tools_used": _texts(rng, 8),
+            "highlights": _texts(rng, 6),
+        } for _ in range(entries)],
+        "skills": {
+            "programming_languages": _texts(rng, 12), "frameworks_libraries": _texts(rng, 12),
+            "tools": _texts(rng, 12), "other": _texts(rng, 12),
+        },
+    })
+
+
+def render_reference(cv: CVSchema, monkeypatch) -> str:
+    """Renders `cv` with the reference helpers in place of the current ones."""
+    # Built before patching, or the shared environment would pick up the reference filters
+    env = templater._get_environment().overlay(cache_size=0)
+    with monkeypatch.context() as patch:
+        # format_date_range and generate_url_text look these up at call time
+        patch.setattr(templater, "escape_latex", reference_escape_latex)
+        patch.setattr(templater, "format_date_month_year", reference_format_date_month_year)
+        env.filters = {
+            **env.filters,
+            "escape_latex": reference_escape_latex,
+            "month_year": reference_format_date_month_year,
+        }
+        return env.get_template("cv.tex.j2").render(cv=cv, last_updated=LAST_UPDATED.strftime("%B %Y"))
+
+
+@pytest.fixture(scope="module")
+def large_cvs():
+    rng = random.Random(16)
+    return [synthetic_cv(rng, entries=rng.randint(20, 60)) for _ in range(5)]
+
+
+def test_escape_latex_matches_reference():
+    rng = random.Random(1)
+    for _ in range(20000):
+        text = _text(rng, 80)
+        assert templater.escape_latex(text) == reference_escape_latex(text)
+    for value in (0, 3.5, None, True):
+        assert templater.escape_latex(value) == reference_escape_latex(value)
+
+
+def test_format_date_month_year_matches_reference():
+    rng = random.Random(2)
+    samples = _DATES + [_date(rng) for _ in range(20000)] + [_text(rng, 10) for _ in range(2000)]
+    for value in samples:
+        assert templater.format_date_month_year(value) == reference_format_date_month_year(value), value
+
+
+def test_large_cv_output_matches_reference(large_cvs, monkeypatch):
+    for cv in large_cvs:
+        expected = render_reference(cv, monkeypatch)
+        assert templater.generate_cv_latex(cv, last_updated=LAST_UPDATED) == expected
+
+
+def test_bench_generate_large_cv(benchmark, large_cvs):
+    cv = large_cvs[0]
+    latex = benchmark(templater.generate_cv_latex, cv, LAST_UPDATED)
+    assert latex.startswith(templater.CV_PREAMBLE[:40])
+
+
+def test_bench_escape_latex(benchmark):
+    rng = random.Random(3)
+    texts = [_text(rng, 200) for _ in range(1000)]
+    benchmark(lambda: [templater.escape_latex(text) for text in texts])
+
+
+def test_bench_format_date_month_year(benchmark):
+    rng = random.Random(4)
+    dates = [_date(rng) for _ in range(1000)]
+    benchmark(lambda: [templater.format_date_month_year(value) for value in dates])